@@ -0,0 +1,343 @@
+import os
+import json
+import time
+import heapq
+import itertools
+import pickle
+import FinancialStatementParser as fsp
+
+class BackfillRunner:
+    """ ****************************************************
+    * BackfillRunner
+    *
+    * Description:
+    *   Resumable backfill of the historical financials for a list
+    *   of tickers. Every accession is recorded in an append-only
+    *   checkpoint journal, so finished accessions are skipped when
+    *   the backfill is restarted after a crash. Failed requests (transport
+    *   errors, throttling and other HTTP errors) are retried with
+    *   exponential backoff, and results are flushed to
+    *   the database in bounded batches instead of being held in
+    *   memory for the whole history.
+    **************************************************** """
+
+    _BACKFILL_DIR = os.path.join("FS_DataBase", "backfill")
+
+    # Journal status values (unparsable filings are not retried)
+    _DONE = 'done'
+    _FAILED = 'failed'
+    _UNPARSABLE = 'unparsable'
+
+    def __init__(self, form_types: tuple = ('10-K',), batch_size: int = 5, max_attempts: int = 5, retry_delay: float = 2.0) -> None:
+        """ ****************************************************
+        * __init__()
+        *
+        * Description:
+        *   Creates the parser and replays the checkpoint journal.
+        *   Raises ValueError if a form type is not supported by the parser.
+        *
+        * form_types -> tuple (10-K)     : form types to backfill
+        * batch_size -> int (5)          : accessions per flushed batch
+        * max_attempts -> int (5)        : attempts per accession before giving up
+        * retry_delay -> float (2.0)     : base retry delay in seconds (doubled per attempt)
+        **************************************************** """
+
+        unsupported = [formType for formType in form_types if formType not in fsp.FinancialStatementParser._HEADER_MATCHERS]
+        if len(unsupported) != 0:
+            raise ValueError(f'Unsupported form type(s) {unsupported}, supported: {list(fsp.FinancialStatementParser._HEADER_MATCHERS.keys())}')
+
+        self._formTypes = list(form_types)
+        self._batchSize = batch_size
+        self._maxAttempts = max_attempts
+        self._retryDelay = retry_delay
+
+        self._parser = fsp.FinancialStatementParser()
+        self._reader = self._parser._financialStatementReader
+
+        self._journalPath = os.path.join(self._BACKFILL_DIR, "journal.jsonl")
+        self._journal = self._ReplayJournal()
+
+    def _ReplayJournal(self) -> dict:
+        """ ****************************************************
+        * _ReplayJournal()
+        *
+        * Description:
+        *   Reads the checkpoint journal. Later entries override earlier
+        *   ones, so the result is the latest state of every accession.
+        *   A partially written last line (crash during a write) is ignored.
+        *   Entries are keyed per ticker, as tickers sharing a CIK (i.e.
+        *   GOOGL and GOOG) share their accessions.
+        *
+        * returns (dict) : (ticker, accession number) => latest journal entry
+        **************************************************** """
+
+        journal = {}
+
+        if os.path.isfile(self._journalPath):
+            with open(self._journalPath, 'r') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                        journal[(entry['ticker'], entry['accession'])] = entry
+
+                    except ValueError:
+                        pass
+
+        return journal
+
+    def _Checkpoint(self, entries: list) -> None:
+        """ ****************************************************
+        * _Checkpoint()
+        *
+        * Description:
+        *   Appends entries to the journal and syncs it to disk.
+        *
+        * entries -> list[dict] : journal entries
+        **************************************************** """
+
+        os.makedirs(self._BACKFILL_DIR, exist_ok=True)
+
+        with open(self._journalPath, 'a') as file:
+            for entry in entries:
+                file.write(json.dumps(entry) + "\n")
+                self._journal[(entry['ticker'], entry['accession'])] = entry
+
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _BatchPrefix(self, ticker: str, formType: str) -> str:
+        """ ****************************************************
+        * _BatchPrefix()
+        *
+        * Description:
+        *   Builds the filename prefix of the batches of a ticker and form type.
+        *
+        * ticker -> str   : ticker associated with the financials
+        * formType -> str : form type of the financials
+        * returns (str) : batch filename prefix (i.e. AAPL_10K_)
+        **************************************************** """
+
+        return f"{ticker}_{formType.replace('-', '').replace('/', '')}_"
+
+    def _Flush(self, ticker: str, batch: list) -> None:
+        """ ****************************************************
+        * _Flush()
+        *
+        * Description:
+        *   Writes a batch of results to the database and only then marks
+        *   its accessions as done in the journal. A crash before the journal
+        *   write leaves the accessions pending, so they are redone on restart.
+        *
+        * ticker -> str        : ticker associated with the batch
+        * batch -> list[dict]  : results (accession, form, filingDate, financials)
+        **************************************************** """
+
+        if len(batch) == 0:
+            return
+
+        os.makedirs(self._BACKFILL_DIR, exist_ok=True)
+
+        # Batches are grouped per form type
+        byForm = {}
+        for result in batch:
+            byForm.setdefault(result['form'], []).append(result)
+
+        for formType, results in byForm.items():
+            filename = self._BatchPrefix(ticker, formType) + f"{results[0]['accession']}.batch.pickle"
+            path = os.path.join(self._BACKFILL_DIR, filename)
+
+            # Write to a temporary file first so a batch is never half-written
+            with open(path + ".tmp", 'wb') as file:
+                pickle.dump(results, file)
+                file.flush()
+                os.fsync(file.fileno())
+
+            os.replace(path + ".tmp", path)
+
+        self._Checkpoint([
+            {'accession': result['accession'], 'ticker': ticker, 'status': self._DONE, 'attempts': result['attempts']}
+            for result in batch
+        ])
+
+    def _RequestAccession(self, cik: str, filing: dict) -> str:
+        """ ****************************************************
+        * _RequestAccession()
+        *
+        * Description:
+        *   Requests a single filing (see FinancialStatementReader.GetFiling).
+        *
+        * cik -> str     : CIK associated with the company
+        * filing -> dict : filing list row (accessionNumber, primaryDocument, form)
+        * returns (str) : raw filing text, None if the request failed
+        **************************************************** """
+
+        accessionNumber = filing['accessionNumber'].replace('-', '')
+
+        return self._reader.GetFiling(accessionNumber, cik, filing['primaryDocument'])
+
+    def _BackfillTicker(self, ticker: str) -> (int, int):
+        """ ****************************************************
+        * _BackfillTicker()
+        *
+        * Description:
+        *   Backfills all pending accessions of a ticker. Failed requests
+        *   are put on a retry queue (ordered by their next attempt time)
+        *   that is drained after the first pass. A filing that cannot be
+        *   parsed is journaled as unparsable and is not requested again;
+        *   a filing without any financial statement table is a result like
+        *   any other and is journaled as done.
+        *
+        * ticker -> str : ticker to backfill
+        * returns (int, int) : number of accessions done and failed
+        **************************************************** """
+
+        done, failed = 0, 0
+
+        filings = self._reader.GetFilingList(ticker, self._formTypes)
+        if filings is None or len(filings) == 0:
+            print(f'{self._BackfillTicker.__name__}(): Could not obtain filing list for: {ticker}')
+            return done, failed
+
+        # The accession number prefix is the CIK of the filer, which can be a filing agent
+        cik = self._reader._GetCIK(ticker)
+
+        # Pending accessions: never seen, or failed with attempts left
+        # Queue entries: (next attempt time, sequence (tie-breaker), attempts, filing)
+        queue = []
+        sequence = itertools.count()
+        for filing in filings.to_dict('records'):
+            entry = self._journal.get((ticker, filing['accessionNumber']))
+
+            if entry is None:
+                queue.append((0.0, next(sequence), 0, filing))
+            elif entry['status'] == self._FAILED and entry['attempts'] < self._maxAttempts:
+                queue.append((0.0, next(sequence), entry['attempts'], filing))
+
+        heapq.heapify(queue)
+
+        batch = []
+        while len(queue) != 0:
+            readyTime, _, attempts, filing = heapq.heappop(queue)
+
+            wait = readyTime - time.monotonic()
+            if wait > 0:
+                # Flush before waiting on a retry, there is no reason to hold the results
+                self._Flush(ticker, batch)
+                batch = []
+                time.sleep(wait)
+
+            attempts += 1
+
+            raw = self._RequestAccession(cik, filing)
+
+            # Failed request (transport error, throttling or other HTTP error) => retry
+            if raw is None:
+                self._Checkpoint([{'accession': filing['accessionNumber'], 'ticker': ticker, 'status': self._FAILED, 'attempts': attempts, 'error': 'filing could not be requested'}])
+
+                if attempts < self._maxAttempts:
+                    delay = self._retryDelay * 2 ** (attempts - 1)
+                    heapq.heappush(queue, (time.monotonic() + delay, next(sequence), attempts, filing))
+                else:
+                    failed += 1
+                    print(f'{self._BackfillTicker.__name__}(): Giving up on {filing["accessionNumber"]}...')
+
+            else:
+                try:
+                    financials = self._parser._ReconstructFinancials(raw, filing['form'])
+
+                    batch.append({
+                        'accession': filing['accessionNumber'],
+                        'form': filing['form'],
+                        'filingDate': filing.get('filingDate'),
+                        'financials': financials,
+                        'attempts': attempts,
+                    })
+                    done += 1
+
+                # Parse errors do not go away on a retry
+                except Exception as e:
+                    self._Checkpoint([{'accession': filing['accessionNumber'], 'ticker': ticker, 'status': self._UNPARSABLE, 'attempts': attempts, 'error': str(e)}])
+                    failed += 1
+                    print(f'{self._BackfillTicker.__name__}(): Could not parse {filing["accessionNumber"]}...\n{e}')
+
+            if len(batch) >= self._batchSize:
+                self._Flush(ticker, batch)
+                batch = []
+
+        self._Flush(ticker, batch)
+
+        return done, failed
+
+    def Run(self, tickers: list) -> dict:
+        """ ****************************************************
+        * Run()
+        *
+        * Description:
+        *   Backfills the tickers. Can be re-run at any time; accessions
+        *   recorded as done in the journal are skipped.
+        *
+        * tickers -> list[str] : tickers to backfill
+        * returns (dict) : ticker => (number of accessions done, failed)
+        **************************************************** """
+
+        summary = {}
+
+        for ticker in tickers:
+            try:
+                summary[ticker] = self._BackfillTicker(ticker)
+
+            except Exception as e:
+                print(f'{self.Run.__name__}(): Backfill of {ticker} failed...\n{e}')
+
+        return summary
+
+    def ReadBackfill(self, ticker: str, formType: str = '10-K') -> list:
+        """ ****************************************************
+        * ReadBackfill()
+        *
+        * Description:
+        *   Reads all flushed batches of a ticker and form type, most
+        *   recent filing first (as with Extract10KFinancialStatementTables).
+        *   An accession redone after a crash can be in more than one batch;
+        *   the most recently written batch wins.
+        *
+        * ticker -> str         : ticker to read
+        * formType -> str (10-K) : form type to read
+        * returns (list[dict]) : historical filings (accession, form, filingDate, financials)
+        **************************************************** """
+
+        byAccession = {}
+        prefix = self._BatchPrefix(ticker, formType)
+
+        if os.path.isdir(self._BACKFILL_DIR):
+            paths = [
+                os.path.join(self._BACKFILL_DIR, filename) for filename in os.listdir(self._BACKFILL_DIR)
+                if filename.startswith(prefix) and filename.endswith('.batch.pickle')
+            ]
+
+            # Oldest batch first, so later batches override earlier ones
+            for path in sorted(paths, key=os.path.getmtime):
+                with open(path, 'rb') as file:
+                    for result in pickle.load(file):
+                        byAccession[result['accession']] = result
+
+        results = sorted(byAccession.values(), key=lambda result: result['filingDate'] or '', reverse=True)
+
+        return results
+
+    def Consolidate(self, ticker: str, formType: str = '10-K') -> bool:
+        """ ****************************************************
+        * Consolidate()
+        *
+        * Description:
+        *   Writes the backfilled financials of a ticker to the parser
+        *   database, so they can be read with ReadFinancials().
+        *
+        * ticker -> str          : ticker to consolidate
+        * formType -> str (10-K) : form type to consolidate
+        * returns (bool) : true if written, false otherwise
+        **************************************************** """
+
+        historicalFilings = [result['financials'] for result in self.ReadBackfill(ticker, formType)]
+
+        return self._parser._WriteFinancialsToDatabase(ticker, historicalFilings, formType)
@@ -0,0 +1,299 @@
+import os
+import re
+import json
+import pickle
+import shutil
+import zipfile
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import LineItemTaxonomy as lit
+import FinancialStatementParser as fsp
+from FinancialStatementReader import FinancialStatementReader
+
+# Primary archive entries are named CIK##########.json (paging files such as
+# CIK##########-submissions-001.json are skipped)
+_ENTRY_PATTERN = re.compile(r'^CIK(\d{10})\.json$')
+
+# Accepted fact durations in days, by form type (instant facts have no duration)
+_ANNUAL_DURATION = (350, 380)
+_QUARTERLY_DURATION = (80, 100)
+
+# Preferred fact units, in order (the first unit a concept reports in is used otherwise)
+_UNITS = ['USD', 'USD/shares', 'shares']
+
+def _IngestCompanyFactsChunk(archivePath: str, entries: dict, forms: tuple) -> int:
+    """ ****************************************************
+    * _IngestCompanyFactsChunk()
+    *
+    * Description:
+    *   Worker process entry point. Opens the companyfacts archive,
+    *   streams the given entries (without extracting them to disk),
+    *   reconstructs the fact tables and writes them to the database.
+    *   Each worker opens its own handle, as zip handles cannot be
+    *   shared across processes.
+    *
+    *   Each table is stored as the single filing of a historical filings
+    *   list ([{COMPANY_FACTS: table}]), so it reads like any other form
+    *   type through FinancialStatementParser.ReadFinancials().
+    *
+    * archivePath -> str : path of companyfacts.zip
+    * entries -> dict    : archive entry => list of database filenames to write
+    * forms -> tuple     : form types to keep (i.e. ('10-K',))
+    * returns (int) : number of entries written
+    **************************************************** """
+
+    written = 0
+    normalizer = lit.LineItemNormalizer()
+
+    with zipfile.ZipFile(archivePath) as archive:
+        for name, filenames in entries.items():
+            try:
+                with archive.open(name) as entry:
+                    facts = json.load(entry)
+
+                table = _BuildFactsTable(facts, forms, normalizer)
+
+                if table is not None:
+                    for filename in filenames:
+                        with open(filename, 'wb') as file:
+                            pickle.dump([{BulkArchiveIngestor.COMPANY_FACTS: table}], file)
+
+                    written += 1
+
+            except Exception as e:
+                print(f'{_IngestCompanyFactsChunk.__name__}(): Could not ingest {name}...\n{e}')
+
+    return written
+
+def _HasDuration(value: dict) -> bool:
+    """ ****************************************************
+    * _HasDuration()
+    *
+    * Description:
+    *   Checks that a fact covers the period of its form type: about a
+    *   year for annual forms, about a quarter for 10-Q. This drops the
+    *   3-month Q4 values a 10-K reports next to the 12-month values for
+    *   the same end date. Instant (balance sheet) facts are accepted.
+    *
+    * value -> dict : companyfacts fact value
+    * returns (bool) : true if the duration matches the form type, false otherwise
+    **************************************************** """
+
+    if 'start' not in value:
+        return True
+
+    days = (pd.Timestamp(value['end']) - pd.Timestamp(value['start'])).days
+    low, high = _QUARTERLY_DURATION if value.get('form', '').startswith('10-Q') else _ANNUAL_DURATION
+
+    return low <= days <= high
+
+def _BuildFactsTable(facts: dict, forms: tuple, normalizer: lit.LineItemNormalizer) -> pd.DataFrame:
+    """ ****************************************************
+    * _BuildFactsTable()
+    *
+    * Description:
+    *   Reconstructs a single table from the us-gaap facts of a
+    *   companyfacts entry. Rows are the us-gaap concepts, indexed by
+    *   (Taxonomy, Category) as with the normalized parser tables, and
+    *   columns are the period end dates. Only one unit per concept and
+    *   facts covering the form's period are kept. When a period is
+    *   reported more than once, the most recently filed value is kept.
+    *
+    * facts -> dict          : companyfacts JSON
+    * forms -> tuple         : form types to keep
+    * normalizer -> LineItemNormalizer : line item normalizer
+    * returns (pd.DataFrame) : facts table, None if no facts are available
+    **************************************************** """
+
+    records = []
+
+    for concept, fact in facts.get('facts', {}).get('us-gaap', {}).items():
+        units = fact.get('units', {})
+        unit = next((unit for unit in _UNITS if unit in units), next(iter(units), None))
+
+        for value in units.get(unit, []):
+            if value.get('form') in forms and _HasDuration(value):
+                records.append((concept, value['end'], value.get('filed', ''), value['val']))
+
+    if len(records) == 0:
+        return None
+
+    table = pd.DataFrame(records, columns=['Category', 'Date', 'Filed', 'Value'])
+    table = table.sort_values('Filed').drop_duplicates(['Category', 'Date'], keep='last')
+    table = table.pivot(index='Category', columns='Date', values='Value')
+    table = table[sorted(table.columns, reverse=True)] # most recent period first
+
+    table.index = pd.MultiIndex.from_arrays(
+        [table.index.map(normalizer.NormalizeConcept), table.index],
+        names=['Taxonomy', 'Category'],
+    )
+
+    return table
+
+class BulkArchiveIngestor:
+    """ ****************************************************
+    * BulkArchiveIngestor
+    *
+    * Description:
+    *   Offline ingestion of the SEC bulk archives (submissions.zip
+    *   and companyfacts.zip) from a local copy. Archive entries are
+    *   streamed out of the zip files and are never extracted to disk.
+    *
+    *   Submissions are written to the submissions cache, which an
+    *   offline FinancialStatementReader serves filing lists from.
+    *   Company facts are reconstructed into tables in parallel worker
+    *   processes and written to the parser database for every ticker
+    *   of the CIK, under the COMPANY_FACTS form type
+    *   (i.e. ReadFinancials('AAPL', BulkArchiveIngestor.COMPANY_FACTS)).
+    **************************************************** """
+
+    # Form type (database key) of the company facts tables
+    COMPANY_FACTS = 'companyfacts'
+
+    def __init__(self, submissions_dir: str = FinancialStatementReader._SUBMISSIONS_DIR, workers: int = None) -> None:
+        """ ****************************************************
+        * __init__()
+        *
+        * Description:
+        *   Creates the parser (CIK index and database access) and sets the
+        *   number of worker processes.
+        *
+        * submissions_dir -> str  : submissions cache directory, defaults to the
+        *                           directory the FinancialStatementReader reads
+        * workers -> int (None)   : number of worker processes,
+        *                           defaults to the CPU count
+        **************************************************** """
+
+        self._submissionsDir = submissions_dir
+        self._workers = workers or os.cpu_count() or 1
+
+        self._parser = fsp.FinancialStatementParser()
+
+    def _ListEntries(self, archive: zipfile.ZipFile) -> list:
+        """ ****************************************************
+        * _ListEntries()
+        *
+        * Description:
+        *   Lists the primary CIK##########.json entries of an archive.
+        *
+        * archive -> zipfile.ZipFile : opened archive
+        * returns (list[str]) : entry names
+        **************************************************** """
+
+        return [name for name in archive.namelist() if _ENTRY_PATTERN.match(os.path.basename(name))]
+
+    def _TickersByCIK(self) -> dict:
+        """ ****************************************************
+        * _TickersByCIK()
+        *
+        * Description:
+        *   Inverts the CIK database of the reader.
+        *
+        * returns (dict) : 10 digit CIK => list of tickers
+        **************************************************** """
+
+        tickers = {}
+        cikDB = self._parser._financialStatementReader._CIK_DB
+
+        for ticker, cik in zip(cikDB['ticker'], cikDB['cik_str']):
+            tickers.setdefault(f"{int(cik):0>10}", []).append(ticker)
+
+        return tickers
+
+    def IngestSubmissions(self, archivePath: str, ciks: list = None) -> int:
+        """ ****************************************************
+        * IngestSubmissions()
+        *
+        * Description:
+        *   Streams the submissions archive into the submissions cache.
+        *   Entries are copied as-is; they are parsed on demand by the
+        *   reader. Use FinancialStatementReader(offline=True) (or
+        *   FinancialStatementParser(offline=True)) to serve filing lists
+        *   from the cache without revalidating them with the SEC.
+        *
+        * archivePath -> str       : path of submissions.zip
+        * ciks -> list[str] (None) : 10 digit CIKs to ingest, all if None
+        * returns (int) : number of entries written
+        **************************************************** """
+
+        written = 0
+
+        try:
+            os.makedirs(self._submissionsDir, exist_ok=True)
+
+            with zipfile.ZipFile(archivePath) as archive:
+                for name in self._ListEntries(archive):
+                    baseName = os.path.basename(name)
+
+                    if ciks is not None and _ENTRY_PATTERN.match(baseName).group(1) not in ciks:
+                        continue
+
+                    with archive.open(name) as entry, open(os.path.join(self._submissionsDir, baseName), 'wb') as file:
+                        shutil.copyfileobj(entry, file)
+
+                    written += 1
+
+        except Exception as e:
+            print(f'{self.IngestSubmissions.__name__}(): Could not ingest {archivePath}...\n{e}')
+
+        return written
+
+    def IngestCompanyFacts(self, archivePath: str, forms: tuple = ('10-K',)) -> int:
+        """ ****************************************************
+        * IngestCompanyFacts()
+        *
+        * Description:
+        *   Reconstructs the fact tables of all entries of the companyfacts
+        *   archive whose CIK has a ticker in the CIK database. The entries
+        *   are split across the worker processes, each of which streams its
+        *   share of the archive and writes the tables to the database.
+        *
+        * archivePath -> str        : path of companyfacts.zip
+        * forms -> tuple (10-K)     : form types to keep
+        * returns (int) : number of entries written
+        **************************************************** """
+
+        written = 0
+
+        try:
+            tickers = self._TickersByCIK()
+
+            with zipfile.ZipFile(archivePath) as archive:
+                entries = {}
+
+                for name in self._ListEntries(archive):
+                    cik = _ENTRY_PATTERN.match(os.path.basename(name)).group(1)
+
+                    if cik in tickers:
+                        entries[name] = [self._parser._DatabaseFilename(ticker, self.COMPANY_FACTS) for ticker in tickers[cik]]
+
+            # Several chunks per worker to balance uneven entry sizes
+            names = list(entries.keys())
+            chunkCount = max(1, min(len(names), self._workers * 4))
+            chunks = [{name: entries[name] for name in names[i::chunkCount]} for i in range(chunkCount)]
+
+            with ProcessPoolExecutor(max_workers=self._workers) as executor:
+                futures = [executor.submit(_IngestCompanyFactsChunk, archivePath, chunk, tuple(forms)) for chunk in chunks]
+
+                for future in futures:
+                    written += future.result()
+
+        except Exception as e:
+            print(f'{self.IngestCompanyFacts.__name__}(): Could not ingest {archivePath}...\n{e}')
+
+        return written
+
+    def ReadCompanyFacts(self, ticker: str) -> pd.DataFrame:
+        """ ****************************************************
+        * ReadCompanyFacts()
+        *
+        * Description:
+        *   Reads an ingested fact table from the database.
+        *
+        * ticker -> str : ticker to read
+        * returns (pd.DataFrame) : fact table, None if read error
+        **************************************************** """
+
+        financials = self._parser.ReadFinancials(ticker, self.COMPANY_FACTS)
+
+        return None if not financials else financials[0][self.COMPANY_FACTS]
@@ -0,0 +1,345 @@
+import os
+import pickle
+import pandas as pd
+import FinancialStatementParser as fsp
+
+class FilingDiff:
+    """ ****************************************************
+    * FilingDiff
+    *
+    * Description:
+    *   Restatement detection between consecutive filings of a ticker.
+    *
+    *   Each filing reports prior periods next to the current one, so
+    *   consecutive filings overlap on at least one period column.
+    *   Every table is reduced to a fingerprint of its stored content,
+    *   and every (table, period) column to a fingerprint (sum of the
+    *   hashed label/value rows), so identical tables and unchanged
+    *   overlapping columns are skipped by comparing two integers. A
+    *   table is only prepared, and a column only diffed row by row, when
+    *   a shared column differs.
+    *
+    *   Results are cached per ticker with the modification time of its
+    *   database file, so a universe scan only reads the tickers that
+    *   received new filings. The column fingerprints (by table
+    *   fingerprint) and the diffs of consecutive filings (by their table
+    *   fingerprints) are cached as well, so a new filing only costs its
+    *   own tables and the diff against the previous filing.
+    **************************************************** """
+
+    _CACHE_DIR = os.path.join("FS_DataBase", "fingerprints")
+
+    def __init__(self, form_type: str = '10-K', tolerance: float = 0.0) -> None:
+        """ ****************************************************
+        * __init__()
+        *
+        * Description:
+        *   Creates the parser (database access).
+        *
+        * form_type -> str (10-K)   : form type of the stored financials
+        * tolerance -> float (0.0)  : absolute difference below which values
+        *                             are considered unchanged
+        **************************************************** """
+
+        self._formType = form_type
+        self._tolerance = tolerance
+
+        self._parser = fsp.FinancialStatementParser()
+
+    def _PrepareTable(self, table: pd.DataFrame) -> pd.DataFrame:
+        """ ****************************************************
+        * _PrepareTable()
+        *
+        * Description:
+        *   Converts an extracted table into a numeric label x period
+        *   frame. Repeated labels (i.e. "Basic" under both EPS and shares)
+        *   are made unique by their occurrence, and period columns are
+        *   converted to ISO dates where possible (see
+        *   FinancialStatementParser.ParsePeriod) so that they align
+        *   across filings.
+        *
+        * table -> pd.DataFrame : extracted table (Category or (Taxonomy, Category) index)
+        * returns (pd.DataFrame) : numeric frame
+        **************************************************** """
+
+        labels = table.index.get_level_values('Category') if isinstance(table.index, pd.MultiIndex) else table.index
+        labels = pd.Series(labels.astype(str))
+
+        occurrence = labels.groupby(labels).cumcount()
+        labels = labels.where(occurrence == 0, labels + ' #' + (occurrence + 1).astype(str))
+
+        periods = [self._parser.ParsePeriod(col) for col in table.columns]
+        periods = [str(col) if period is None else period.strftime('%Y-%m-%d') for period, col in zip(periods, table.columns)]
+
+        frame = table.apply(pd.to_numeric, errors='coerce')
+        frame.index = labels.values
+        frame.columns = periods
+
+        return frame.loc[:, ~frame.columns.duplicated()]
+
+    def _TableFingerprint(self, table: pd.DataFrame) -> int:
+        """ ****************************************************
+        * _TableFingerprint()
+        *
+        * Description:
+        *   Fingerprints an extracted table as stored (labels, period
+        *   headers and raw values), without preparing it.
+        *
+        * table -> pd.DataFrame : extracted table
+        * returns (int) : table fingerprint
+        **************************************************** """
+
+        rows = pd.util.hash_pandas_object(table, index=True).sum()
+        columns = pd.util.hash_pandas_object(pd.Series([str(col) for col in table.columns]), index=True).sum()
+
+        return int(rows) + int(columns)
+
+    def _Fingerprint(self, frame: pd.DataFrame) -> dict:
+        """ ****************************************************
+        * _Fingerprint()
+        *
+        * Description:
+        *   Fingerprints each period column of a prepared table. Row hashes
+        *   combine the label and value, and are summed so the fingerprint
+        *   does not depend on the row order.
+        *
+        * frame -> pd.DataFrame : prepared table (see @_PrepareTable)
+        * returns (dict) : period => fingerprint
+        **************************************************** """
+
+        return {
+            period: int(pd.util.hash_pandas_object(frame[period].dropna(), index=True).sum())
+            for period in frame.columns
+        }
+
+    def _FingerprintFiling(self, financials: dict, known: dict, frames: dict) -> dict:
+        """ ****************************************************
+        * _FingerprintFiling()
+        *
+        * Description:
+        *   Fingerprints every table of a filing. The period fingerprints
+        *   of a table already seen (same table fingerprint) are reused
+        *   from @known; only new tables are prepared.
+        *
+        * financials -> dict : reconstructed financials of the filing
+        * known -> dict      : table fingerprint => period fingerprints, updated in place
+        * frames -> dict     : table fingerprint => prepared table, updated in place
+        * returns (dict) : table header => (table fingerprint, period fingerprints), None if no table
+        **************************************************** """
+
+        fingerprints = {}
+
+        for hdr, table in (financials or {}).items():
+            if table is None:
+                fingerprints[hdr] = None
+                continue
+
+            tablePrint = self._TableFingerprint(table)
+
+            if tablePrint not in known:
+                frames[tablePrint] = self._PrepareTable(table)
+                known[tablePrint] = self._Fingerprint(frames[tablePrint])
+
+            fingerprints[hdr] = (tablePrint, known[tablePrint])
+
+        return fingerprints
+
+    def _DiffColumn(self, newer: pd.Series, older: pd.Series) -> pd.DataFrame:
+        """ ****************************************************
+        * _DiffColumn()
+        *
+        * Description:
+        *   Row-level diff of one period column reported in two filings.
+        *   Line items missing from either filing are reported with a NaN
+        *   on that side.
+        *
+        * newer -> pd.Series : period column of the newer filing
+        * older -> pd.Series : period column of the older filing
+        * returns (pd.DataFrame) : restated line items (Category, Previous, Restated, Change)
+        **************************************************** """
+
+        aligned = pd.concat([older.rename('Previous'), newer.rename('Restated')], axis=1)
+        aligned = aligned.dropna(how='all')
+
+        change = aligned['Restated'] - aligned['Previous']
+        oneSided = aligned['Previous'].isna() != aligned['Restated'].isna()
+
+        restated = aligned[oneSided | (change.abs() > self._tolerance)].copy()
+        restated['Change'] = change
+        restated.index.name = 'Category'
+
+        return restated.reset_index()
+
+    def _DiffFingerprinted(self, newer: dict, older: dict, newerFingerprints: dict, olderFingerprints: dict, frames: dict) -> pd.DataFrame:
+        """ ****************************************************
+        * _DiffFingerprinted()
+        *
+        * Description:
+        *   Diffs two fingerprinted filings (see @DiffFilings). Identical
+        *   tables are skipped outright, and a table is only prepared when
+        *   one of its shared period columns differs.
+        *
+        * newer -> dict             : reconstructed financials of the newer filing
+        * older -> dict             : reconstructed financials of the older filing
+        * newerFingerprints -> dict : fingerprints of the newer filing (see @_FingerprintFiling)
+        * olderFingerprints -> dict : fingerprints of the older filing (see @_FingerprintFiling)
+        * frames -> dict            : table fingerprint => prepared table, updated in place
+        * returns (pd.DataFrame) : restated line items (Table, Period, Category, Previous, Restated, Change)
+        **************************************************** """
+
+        diffs = []
+
+        for hdr in newerFingerprints.keys() & olderFingerprints.keys():
+            if newerFingerprints[hdr] is None or olderFingerprints[hdr] is None:
+                continue
+
+            newerTable, newerPrints = newerFingerprints[hdr]
+            olderTable, olderPrints = olderFingerprints[hdr]
+
+            # Identical table => skip without touching the columns
+            if newerTable == olderTable:
+                continue
+
+            for period in newerPrints.keys() & olderPrints.keys():
+                # Unchanged column => skip without touching the rows
+                if newerPrints[period] == olderPrints[period]:
+                    continue
+
+                if newerTable not in frames:
+                    frames[newerTable] = self._PrepareTable(newer[hdr])
+                if olderTable not in frames:
+                    frames[olderTable] = self._PrepareTable(older[hdr])
+
+                diff = self._DiffColumn(frames[newerTable][period], frames[olderTable][period])
+                diff.insert(0, 'Period', period)
+                diff.insert(0, 'Table', hdr)
+                diffs.append(diff)
+
+        if len(diffs) == 0:
+            return pd.DataFrame(columns=['Table', 'Period', 'Category', 'Previous', 'Restated', 'Change'])
+
+        return pd.concat(diffs, ignore_index=True)
+
+    def DiffFilings(self, newer: dict, older: dict) -> pd.DataFrame:
+        """ ****************************************************
+        * DiffFilings()
+        *
+        * Description:
+        *   Reports the restated line items of the periods reported in
+        *   both filings.
+        *
+        * newer -> dict : reconstructed financials of the newer filing
+        * older -> dict : reconstructed financials of the older filing
+        * returns (pd.DataFrame) : restated line items (Table, Period, Category, Previous, Restated, Change)
+        **************************************************** """
+
+        known, frames = {}, {}
+
+        return self._DiffFingerprinted(
+            newer, older,
+            self._FingerprintFiling(newer, known, frames), self._FingerprintFiling(older, known, frames),
+            frames,
+        )
+
+    def ScanTicker(self, ticker: str) -> pd.DataFrame:
+        """ ****************************************************
+        * ScanTicker()
+        *
+        * Description:
+        *   Reports the restatements between all consecutive stored filings
+        *   of a ticker. The result is served from the cache unless the
+        *   ticker's database file changed since the last scan.
+        *
+        * ticker -> str : ticker to scan
+        * returns (pd.DataFrame) : restated line items, with the Filing column holding
+        *                          the index of the restating (newer) filing; None if
+        *                          the ticker has no stored financials
+        **************************************************** """
+
+        filename = self._parser._DatabaseFilename(ticker, self._formType)
+        if not os.path.isfile(filename):
+            return None
+
+        signature = os.path.getmtime(filename)
+        cacheFile = os.path.join(self._CACHE_DIR, os.path.basename(filename))
+
+        cache = None
+        if os.path.isfile(cacheFile):
+            try:
+                with open(cacheFile, 'rb') as file:
+                    cache = pickle.load(file)
+
+            except Exception as e:
+                print(f'{self.ScanTicker.__name__}(): Could not read fingerprint cache of {ticker}...\n{e}')
+
+        if cache is not None and cache.get('signature') == signature:
+            return cache['restatements']
+
+        knownPrints = cache.get('fingerprints', {}) if cache is not None else {}
+        knownDiffs = cache.get('diffs', {}) if cache is not None else {}
+
+        historicalFilings = self._parser.ReadFinancials(ticker, self._formType) or []
+
+        # Filings are identified by their table fingerprints, not by their position
+        frames = {}
+        fingerprints = [self._FingerprintFiling(financials, knownPrints, frames) for financials in historicalFilings]
+        filingKeys = [tuple(sorted((hdr, prints[0]) for hdr, prints in filing.items() if prints is not None)) for filing in fingerprints]
+
+        # Filings are stored most recent first; pairs diffed in a previous scan are reused
+        diffs = []
+        pairDiffs = {}
+        for idx in range(len(historicalFilings) - 1):
+            pair = (filingKeys[idx], filingKeys[idx + 1])
+
+            if pair in knownDiffs:
+                pairDiffs[pair] = knownDiffs[pair]
+            elif pair not in pairDiffs:
+                pairDiffs[pair] = self._DiffFingerprinted(historicalFilings[idx], historicalFilings[idx + 1], fingerprints[idx], fingerprints[idx + 1], frames)
+
+            if not pairDiffs[pair].empty:
+                diff = pairDiffs[pair].copy()
+                diff.insert(0, 'Filing', idx)
+                diffs.append(diff)
+
+        # Only the tables of the stored filings are kept in the cache
+        tablePrints = {prints[0] for filing in fingerprints for prints in filing.values() if prints is not None}
+        knownPrints = {tablePrint: prints for tablePrint, prints in knownPrints.items() if tablePrint in tablePrints}
+
+        restatements = pd.concat(diffs, ignore_index=True) if len(diffs) != 0 else pd.DataFrame(columns=['Filing', 'Table', 'Period', 'Category', 'Previous', 'Restated', 'Change'])
+
+        try:
+            os.makedirs(self._CACHE_DIR, exist_ok=True)
+
+            with open(cacheFile, 'wb') as file:
+                pickle.dump({'signature': signature, 'fingerprints': knownPrints, 'diffs': pairDiffs, 'restatements': restatements}, file)
+
+        except Exception as e:
+            print(f'{self.ScanTicker.__name__}(): Could not write fingerprint cache of {ticker}...\n{e}')
+
+        return restatements
+
+    def ScanUniverse(self, tickers: list) -> pd.DataFrame:
+        """ ****************************************************
+        * ScanUniverse()
+        *
+        * Description:
+        *   Reports the restatements of all tickers (see @ScanTicker).
+        *
+        * tickers -> list[str] : tickers to scan
+        * returns (pd.DataFrame) : restated line items with a Ticker column
+        **************************************************** """
+
+        results = []
+
+        for ticker in tickers:
+            restatements = self.ScanTicker(ticker)
+
+            if restatements is not None and not restatements.empty:
+                restatements = restatements.copy()
+                restatements.insert(0, 'Ticker', ticker)
+                results.append(restatements)
+
+        if len(results) == 0:
+            return pd.DataFrame(columns=['Ticker', 'Filing', 'Table', 'Period', 'Category', 'Previous', 'Restated', 'Change'])
+
+        return pd.concat(results, ignore_index=True)
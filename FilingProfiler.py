@@ -0,0 +1,269 @@
+import os
+import io
+import sys
+import time
+import pstats
+import argparse
+import cProfile
+import threading
+import collections
+from bs4 import BeautifulSoup
+import FinancialStatementParser as fsp
+
+class FilingProfiler:
+    """ ****************************************************
+    * FilingProfiler
+    *
+    * Description:
+    *   Debug tool for a single filing. Fetches (or reads) the filing
+    *   and reconstructs its financials twice: once under cProfile and
+    *   once under a stack sampler, so neither profiler distorts the
+    *   other's output. Then writes:
+    *     - profile.collapsed : collapsed stacks (flamegraph.pl / speedscope)
+    *     - profile.txt       : per-function summary
+    *     - tables.txt        : pathological tables (huge or deeply nested)
+    **************************************************** """
+
+    # Functions reported in the per-function summary
+    _SUMMARY_FUNCTIONS = ['_ReconstructFinancials', '_ExtractTable', '_ProcessRow', '_HasNumberCharacters', '_HasMonth', '_ParseNumberItem']
+
+    # Pathological table thresholds
+    _MAX_TABLE_ROWS = 500
+    _MAX_TABLE_NESTING = 2
+
+    def __init__(self, output_dir: str = "profile", sample_interval: float = 0.001) -> None:
+        """ ****************************************************
+        * __init__()
+        *
+        * Description:
+        *   Creates the parser used for the profiled runs.
+        *
+        * output_dir -> str (profile)        : directory of the profile outputs
+        * sample_interval -> float (0.001)   : stack sampling interval in seconds,
+        *                                      None to skip the sampling pass
+        **************************************************** """
+
+        self._outputDir = output_dir
+        self._sampleInterval = sample_interval
+
+        self._parser = fsp.FinancialStatementParser()
+
+    def _SampleStacks(self, threadId: int, stop: threading.Event, stacks: collections.Counter) -> None:
+        """ ****************************************************
+        * _SampleStacks()
+        *
+        * Description:
+        *   Sampler thread. Records the call stack of the profiled thread
+        *   (root first) every sampling interval until stopped.
+        *
+        * threadId -> int               : identifier of the profiled thread
+        * stop -> threading.Event       : stop flag
+        * stacks -> collections.Counter : collapsed stack => sample count
+        **************************************************** """
+
+        while not stop.is_set():
+            frame = sys._current_frames().get(threadId)
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+
+            if len(stack) != 0:
+                stacks[';'.join(reversed(stack))] += 1
+
+            time.sleep(self._sampleInterval)
+
+    def _Profile(self, loadFiling, formType: str) -> dict:
+        """ ****************************************************
+        * _Profile()
+        *
+        * Description:
+        *   Loads the filing once, reconstructs it in a cProfile pass and
+        *   in a separate sampling pass, and writes the profile outputs.
+        *
+        * loadFiling -> callable : returns the raw filing text
+        * formType -> str        : form type of the filing
+        * returns (dict) : reconstructed financials, None if the filing
+        *                  could not be loaded
+        **************************************************** """
+
+        start = time.perf_counter()
+        filing = loadFiling()
+        loadTime = time.perf_counter() - start
+
+        if filing is None:
+            print(f'{self._Profile.__name__}(): Could not load the filing...')
+            return None
+
+        os.makedirs(self._outputDir, exist_ok=True)
+
+        # cProfile pass
+        profiler = cProfile.Profile()
+
+        start = time.perf_counter()
+        profiler.enable()
+
+        try:
+            financials = self._parser._ReconstructFinancials(filing, formType)
+
+        finally:
+            profiler.disable()
+
+        self._WriteSummary(profiler, loadTime, time.perf_counter() - start)
+
+        # Sampling pass
+        if self._sampleInterval is not None:
+            stacks = collections.Counter()
+            stop = threading.Event()
+
+            sampler = threading.Thread(target=self._SampleStacks, args=(threading.get_ident(), stop, stacks), daemon=True)
+            sampler.start()
+
+            try:
+                self._parser._ReconstructFinancials(filing, formType)
+
+            finally:
+                stop.set()
+                sampler.join()
+
+            self._WriteCollapsedStacks(stacks)
+
+        self._WritePathologicalTables(filing)
+
+        return financials
+
+    def _WriteCollapsedStacks(self, stacks: collections.Counter) -> None:
+        """ ****************************************************
+        * _WriteCollapsedStacks()
+        *
+        * Description:
+        *   Writes the sampled stacks in collapsed format ("a;b;c count").
+        *
+        * stacks -> collections.Counter : collapsed stack => sample count
+        **************************************************** """
+
+        with open(os.path.join(self._outputDir, 'profile.collapsed'), 'w') as file:
+            for stack, count in stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+    def _WriteSummary(self, profiler: cProfile.Profile, loadTime: float, elapsed: float) -> None:
+        """ ****************************************************
+        * _WriteSummary()
+        *
+        * Description:
+        *   Writes the per-function summary of the parser functions
+        *   (see @_SUMMARY_FUNCTIONS) and of the DataFrame construction,
+        *   followed by the top functions by cumulative time.
+        *
+        * profiler -> cProfile.Profile : finished profiler
+        * loadTime -> float            : wall time of the filing load in seconds
+        * elapsed -> float             : wall time of the profiled reconstruction in seconds
+        **************************************************** """
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+
+        stream.write(f"Load time: {loadTime:.3f}s\n")
+        stream.write(f"Wall time: {elapsed:.3f}s (under cProfile)\n\n")
+        stream.write(f"{'function':<40}{'calls':>12}{'tottime':>12}{'cumtime':>12}\n")
+
+        for (filename, line, name), (cc, nc, tt, ct, callers) in sorted(stats.stats.items(), key=lambda item: -item[1][3]):
+            isParser = name in self._SUMMARY_FUNCTIONS and filename.endswith('FinancialStatementParser.py')
+            isDataFrame = name == '__init__' and filename.replace('\\', '/').endswith('pandas/core/frame.py')
+
+            if isParser or isDataFrame:
+                label = 'DataFrame.__init__' if isDataFrame else name
+                stream.write(f"{label:<40}{nc:>12}{tt:>12.3f}{ct:>12.3f}\n")
+
+        stream.write("\n")
+        stats.sort_stats('cumulative').print_stats(25)
+
+        with open(os.path.join(self._outputDir, 'profile.txt'), 'w') as file:
+            file.write(stream.getvalue())
+
+    def _WritePathologicalTables(self, filing: str) -> None:
+        """ ****************************************************
+        * _WritePathologicalTables()
+        *
+        * Description:
+        *   Flags the tables of the filing with more rows than
+        *   @_MAX_TABLE_ROWS or nested at least @_MAX_TABLE_NESTING deep.
+        *
+        * filing -> str : raw filing text
+        **************************************************** """
+
+        soup = BeautifulSoup(filing, 'html')
+        flagged = []
+
+        for idx, table in enumerate(soup.find_all('table')):
+            rows = len(table.find_all('tr'))
+            nesting = len(table.find_parents('table'))
+
+            if rows > self._MAX_TABLE_ROWS or nesting >= self._MAX_TABLE_NESTING:
+                snippet = ' '.join(table.get_text(' ', strip=True).split())[:80]
+                flagged.append(f"table {idx}: rows={rows} nesting={nesting} '{snippet}'")
+
+        with open(os.path.join(self._outputDir, 'tables.txt'), 'w') as file:
+            file.write(f"{len(flagged)} pathological table(s)\n")
+
+            for line in flagged:
+                file.write(line + "\n")
+
+    def ProfileFile(self, path: str, formType: str = '10-K') -> dict:
+        """ ****************************************************
+        * ProfileFile()
+        *
+        * Description:
+        *   Profiles the reconstruction of a filing stored locally.
+        *
+        * path -> str             : path of the filing
+        * formType -> str (10-K)  : form type of the filing
+        * returns (dict) : reconstructed financials
+        **************************************************** """
+
+        def loadFiling():
+            with open(path, 'r', encoding='utf-8', errors='replace') as file:
+                return file.read()
+
+        return self._Profile(loadFiling, formType)
+
+    def ProfileAccession(self, accessionNumber: str, cik: str, fileName: str, formType: str = '10-K') -> dict:
+        """ ****************************************************
+        * ProfileAccession()
+        *
+        * Description:
+        *   Times the request and profiles the reconstruction of a single filing.
+        *
+        * accessionNumber -> str : accession number (with or without dashes)
+        * cik -> str             : CIK associated with the company
+        * fileName -> str        : primary document of the filing
+        * formType -> str (10-K) : form type of the filing
+        * returns (dict) : reconstructed financials
+        **************************************************** """
+
+        accessionNumber = accessionNumber.replace('-', '')
+        reader = self._parser._financialStatementReader
+
+        return self._Profile(lambda: reader.GetFiling(accessionNumber, cik, fileName), formType)
+
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='Profile the reconstruction of a single filing.')
+    args.add_argument('--file', help='path of a locally stored filing')
+    args.add_argument('--accession', help='accession number of the filing')
+    args.add_argument('--cik', help='CIK associated with the company')
+    args.add_argument('--document', help='primary document of the filing')
+    args.add_argument('--form', default='10-K', choices=list(fsp.FinancialStatementParser._HEADER_MATCHERS.keys()), help='form type of the filing')
+    args.add_argument('--output-dir', default='profile', help='directory of the profile outputs')
+    args.add_argument('--no-sampling', action='store_true', help='skip the stack sampling pass')
+    args = args.parse_args()
+
+    profiler = FilingProfiler(args.output_dir, None if args.no_sampling else 0.001)
+
+    if args.file:
+        profiler.ProfileFile(args.file, args.form)
+    elif args.accession and args.cik and args.document:
+        profiler.ProfileAccession(args.accession, args.cik, args.document, args.form)
+    else:
+        print('Either --file or --accession, --cik and --document are required...')
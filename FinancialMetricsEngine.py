@@ -0,0 +1,413 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+import LineItemTaxonomy as lit
+import FinancialStatementParser as fsp
+from BulkArchiveIngestor import BulkArchiveIngestor
+from enterpriseDCFModel import EnterpriseValue
+
+class FinancialMetricsEngine:
+    """ ****************************************************
+    * FinancialMetricsEngine
+    *
+    * Description:
+    *   Derived metrics (margins, ROIC, FCF, leverage, growth) over
+    *   the stored financials of all tickers.
+    *
+    *   The stored statements are normalized to the line item taxonomy
+    *   (see LineItemTaxonomy) and collected into a single columnar panel
+    *   indexed by (Ticker, Period). Metrics are computed on the whole
+    *   panel with vectorized column operations. The panel and metrics
+    *   are cached per ticker with the modification time of its database
+    *   file, so only tickers with new filings are recomputed and only
+    *   their cache files are rewritten.
+    *
+    *   Periods are keyed on their end date, so only annual form types
+    *   are supported (a 10-Q reports 3-month, 6-month and year-to-date
+    *   columns for the same end date).
+    **************************************************** """
+
+    _CACHE_DIR = os.path.join("FS_DataBase", "metrics")
+
+    # Supported form types (company facts are ingested from the 10-K facts by default)
+    _ANNUAL_FORMS = ['10-K', '10-K/A', BulkArchiveIngestor.COMPANY_FACTS]
+
+    # Line items reported as subtotals, for which "Total ..." rows are preferred
+    _SUBTOTAL_ITEMS = ['CurrentAssets', 'TotalAssets', 'CurrentLiabilities', 'TotalLiabilities', 'TotalEquity']
+
+    # Preference of the match tiers when a line item is matched by several rows
+    _TIER_RANKS = {lit.LineItemNormalizer.EXACT: 0, lit.LineItemNormalizer.NORMALIZED: 1, lit.LineItemNormalizer.FUZZY: 2}
+
+    # Line items used by the metrics (missing items are NaN)
+    _LINE_ITEMS = [
+        'Revenue', 'COGS', 'GrossProfit', 'OperatingIncome', 'PretaxIncome', 'IncomeTax', 'NetIncome',
+        'Cash', 'ShortTermInvestments', 'CurrentAssets', 'TotalAssets', 'CurrentLiabilities',
+        'LongTermDebt', 'TotalLiabilities', 'TotalEquity', 'CFO', 'CapEx', 'DepreciationAndAmortization',
+    ]
+
+    def __init__(self, form_type: str = '10-K', tax_rate: float = 0.21) -> None:
+        """ ****************************************************
+        * __init__()
+        *
+        * Description:
+        *   Creates the parser (database access). The cache is loaded per
+        *   ticker on update.
+        *
+        * form_type -> str (10-K)    : form type of the stored financials (see @_ANNUAL_FORMS)
+        * tax_rate -> float (0.21)   : tax rate used when the effective tax
+        *                              rate cannot be computed
+        **************************************************** """
+
+        if form_type not in self._ANNUAL_FORMS:
+            raise ValueError(f'Unsupported form type {form_type}, supported: {self._ANNUAL_FORMS}')
+
+        self._formType = form_type
+        self._taxRate = tax_rate
+
+        self._parser = fsp.FinancialStatementParser()
+        self._normalizer = lit.LineItemNormalizer()
+
+        self._signatures = {}  # ticker => database file modification time
+        self._panel = pd.DataFrame(columns=self._LINE_ITEMS, index=pd.MultiIndex.from_tuples([], names=['Ticker', 'Period']))
+        self._metrics = pd.DataFrame(index=self._panel.index)
+
+    def _CacheFilename(self, ticker: str) -> str:
+        """ ****************************************************
+        * _CacheFilename()
+        *
+        * Description:
+        *   Builds the cache filename of a ticker (named after its database file).
+        *
+        * ticker -> str : ticker of the cache
+        * returns (str) : cache filename
+        **************************************************** """
+
+        return os.path.join(self._CACHE_DIR, os.path.basename(self._parser._DatabaseFilename(ticker, self._formType)))
+
+    def _LoadCache(self, ticker: str) -> dict:
+        """ ****************************************************
+        * _LoadCache()
+        *
+        * Description:
+        *   Loads the cached panel, metrics and signature of a ticker.
+        *
+        * ticker -> str : ticker to load
+        * returns (dict) : cache (signature, panel, metrics), None if not available
+        **************************************************** """
+
+        cacheFile = self._CacheFilename(ticker)
+
+        if os.path.isfile(cacheFile):
+            try:
+                with open(cacheFile, 'rb') as file:
+                    return pickle.load(file)
+
+            except Exception as e:
+                print(f'{self._LoadCache.__name__}(): Could not read metrics cache of {ticker}...\n{e}')
+
+        return None
+
+    def _SaveCache(self, ticker: str, signature: float, panel: pd.DataFrame, metrics: pd.DataFrame) -> None:
+        """ ****************************************************
+        * _SaveCache()
+        *
+        * Description:
+        *   Writes the panel, metrics and signature of a ticker to its cache.
+        *
+        * ticker -> str           : ticker of the cache
+        * signature -> float      : database file modification time
+        * panel -> pd.DataFrame   : ticker panel
+        * metrics -> pd.DataFrame : ticker metrics
+        **************************************************** """
+
+        try:
+            os.makedirs(self._CACHE_DIR, exist_ok=True)
+
+            with open(self._CacheFilename(ticker), 'wb') as file:
+                pickle.dump({'signature': signature, 'panel': panel, 'metrics': metrics}, file)
+
+        except Exception as e:
+            print(f'{self._SaveCache.__name__}(): Could not write metrics cache of {ticker}...\n{e}')
+
+    def _SelectRows(self, table: pd.DataFrame) -> pd.DataFrame:
+        """ ****************************************************
+        * _SelectRows()
+        *
+        * Description:
+        *   Keeps one row per line item of a normalized table. Exact and
+        *   normalized label matches are preferred over fuzzy ones, then
+        *   "Total ..." rows for the subtotal items (see @_SUBTOTAL_ITEMS),
+        *   then the first row. Company facts rows are matched on their
+        *   us-gaap concept and all rank as exact.
+        *
+        * table -> pd.DataFrame : normalized table ((Taxonomy, Category) index)
+        * returns (pd.DataFrame) : table indexed by line item
+        **************************************************** """
+
+        taxonomy = table.index.get_level_values('Taxonomy')
+        labels = table.index.get_level_values('Category').astype(str)
+
+        if self._formType == BulkArchiveIngestor.COMPANY_FACTS:
+            tierRank = np.zeros(len(table))
+        else:
+            tierRank = [self._TIER_RANKS.get(self._normalizer.MatchTier(label), 0) for label in labels]
+
+        totalRank = [
+            0 if item in self._SUBTOTAL_ITEMS and label.strip().lower().startswith('total') else 1
+            for item, label in zip(taxonomy, labels)
+        ]
+
+        ranks = pd.DataFrame({'tier': tierRank, 'total': totalRank, 'position': np.arange(len(table))})
+        order = ranks.sort_values(['tier', 'total', 'position']).index
+
+        table = table.iloc[order].droplevel('Category')
+
+        return table[table.index.notna() & ~table.index.duplicated()]
+
+    def _BuildTickerPanel(self, ticker: str, historicalFilings: list) -> pd.DataFrame:
+        """ ****************************************************
+        * _BuildTickerPanel()
+        *
+        * Description:
+        *   Collects the line items of all stored filings of a ticker into
+        *   a (Ticker, Period) x line item frame. Filings are stored most
+        *   recent first, so restated values take precedence over the
+        *   values originally reported.
+        *
+        * ticker -> str                   : ticker of the financials
+        * historicalFilings -> list[dict] : stored financials (see Read10KFinancials)
+        * returns (pd.DataFrame) : ticker panel
+        **************************************************** """
+
+        series = []
+
+        for financials in historicalFilings or []:
+            for table in (financials or {}).values():
+                if table is None or table.empty:
+                    continue
+
+                if not isinstance(table.index, pd.MultiIndex):
+                    table = self._normalizer.NormalizeTable(table)
+
+                # One row per line item, one column per period
+                table = self._SelectRows(table)
+
+                # Period end dates (see FinancialStatementParser.ParsePeriod), NaT if not a period
+                table.columns = pd.DatetimeIndex([self._parser.ParsePeriod(col) for col in table.columns])
+                table = table.loc[:, table.columns.notna() & ~table.columns.duplicated()]
+
+                stacked = table.apply(pd.to_numeric, errors='coerce').stack()
+                stacked.index.names = ['LineItem', 'Period']
+                series.append(stacked)
+
+        if len(series) == 0:
+            return self._panel.iloc[0:0]
+
+        values = pd.concat(series)
+        values = values[~values.index.duplicated(keep='first')]
+
+        panel = values.unstack('LineItem').reindex(columns=self._LINE_ITEMS)
+        panel.index = pd.MultiIndex.from_product([[ticker], panel.index], names=['Ticker', 'Period'])
+
+        return panel.sort_index()
+
+    def _ComputeMetrics(self, panel: pd.DataFrame) -> pd.DataFrame:
+        """ ****************************************************
+        * _ComputeMetrics()
+        *
+        * Description:
+        *   Computes the metric library over a panel. All metrics are
+        *   column operations; growth rates are computed per ticker over
+        *   the sorted periods.
+        *
+        * panel -> pd.DataFrame : (Ticker, Period) x line item panel
+        * returns (pd.DataFrame) : (Ticker, Period) x metric frame
+        **************************************************** """
+
+        p = panel.astype(float)
+        metrics = pd.DataFrame(index=p.index)
+
+        grossProfit = p['GrossProfit'].fillna(p['Revenue'] - p['COGS'])
+        equity = p['TotalEquity'].replace(0, np.nan)
+        revenue = p['Revenue'].replace(0, np.nan)
+
+        taxRate = (p['IncomeTax'] / p['PretaxIncome'].replace(0, np.nan)).clip(0, 1).fillna(self._taxRate)
+        investedCapital = (p['TotalEquity'] + p['LongTermDebt'].fillna(0)).replace(0, np.nan)
+
+        # Margins
+        metrics['GrossMargin'] = grossProfit / revenue
+        metrics['OperatingMargin'] = p['OperatingIncome'] / revenue
+        metrics['NetMargin'] = p['NetIncome'] / revenue
+
+        # Cash flows (CapEx is reported as an outflow with either sign)
+        metrics['FCF'] = p['CFO'] - p['CapEx'].abs()
+        metrics['FCFMargin'] = metrics['FCF'] / revenue
+
+        # Returns
+        metrics['NOPAT'] = p['OperatingIncome'] * (1 - taxRate)
+        metrics['ROIC'] = metrics['NOPAT'] / investedCapital
+        metrics['ROE'] = p['NetIncome'] / equity
+        metrics['ROA'] = p['NetIncome'] / p['TotalAssets'].replace(0, np.nan)
+
+        # Leverage and liquidity
+        metrics['DebtToEquity'] = p['LongTermDebt'] / equity
+        metrics['AssetsToEquity'] = p['TotalAssets'] / equity
+        metrics['CurrentRatio'] = p['CurrentAssets'] / p['CurrentLiabilities'].replace(0, np.nan)
+        metrics['NetDebt'] = p['LongTermDebt'].fillna(0) - p['Cash'].fillna(0) - p['ShortTermInvestments'].fillna(0)
+
+        # Growth rates (per ticker, over the sorted periods)
+        grouped = pd.concat([p['Revenue'], p['NetIncome'], metrics['FCF']], axis=1).sort_index().groupby(level='Ticker')
+        growth = grouped.pct_change(fill_method=None)
+
+        metrics['RevenueGrowth'] = growth['Revenue']
+        metrics['NetIncomeGrowth'] = growth['NetIncome']
+        metrics['FCFGrowth'] = growth['FCF']
+
+        return metrics.replace([np.inf, -np.inf], np.nan)
+
+    def Update(self, tickers: list) -> pd.DataFrame:
+        """ ****************************************************
+        * Update()
+        *
+        * Description:
+        *   Brings the panel and metrics up to date for the tickers. Tickers
+        *   not yet in memory are loaded from their cache. Only tickers whose
+        *   database file changed since they were cached are re-read,
+        *   recomputed and written back to their cache.
+        *
+        * tickers -> list[str] : tickers to update
+        * returns (pd.DataFrame) : metrics of the given tickers
+        **************************************************** """
+
+        updated, panels, metrics = [], [], []
+
+        for ticker in tickers:
+            filename = self._parser._DatabaseFilename(ticker, self._formType)
+
+            if not os.path.isfile(filename):
+                continue
+
+            signature = os.path.getmtime(filename)
+            if self._signatures.get(ticker) == signature:
+                continue
+
+            cache = self._LoadCache(ticker)
+
+            if cache is None or cache['signature'] != signature:
+                tickerPanel = self._BuildTickerPanel(ticker, self._parser.ReadFinancials(ticker, self._formType))
+                cache = {'signature': signature, 'panel': tickerPanel, 'metrics': self._ComputeMetrics(tickerPanel)}
+                self._SaveCache(ticker, signature, cache['panel'], cache['metrics'])
+
+            self._signatures[ticker] = signature
+            updated.append(ticker)
+            panels.append(cache['panel'])
+            metrics.append(cache['metrics'])
+
+        if len(updated) != 0:
+            # Replace the blocks of the updated tickers only
+            keep = ~self._panel.index.get_level_values('Ticker').isin(updated)
+            self._panel = pd.concat([self._panel[keep]] + panels).sort_index()
+
+            keep = ~self._metrics.index.get_level_values('Ticker').isin(updated)
+            self._metrics = pd.concat([self._metrics[keep]] + metrics).sort_index()
+
+        return self.GetMetrics(tickers)
+
+    def GetPanel(self, tickers: list = None) -> pd.DataFrame:
+        """ ****************************************************
+        * GetPanel()
+        *
+        * Description:
+        *   Returns the line item panel of the updated tickers (see @Update).
+        *
+        * tickers -> list[str] (None) : tickers to select, all if None
+        * returns (pd.DataFrame) : (Ticker, Period) x line item panel
+        **************************************************** """
+
+        if tickers is None:
+            return self._panel
+
+        return self._panel[self._panel.index.get_level_values('Ticker').isin(tickers)]
+
+    def GetMetrics(self, tickers: list = None) -> pd.DataFrame:
+        """ ****************************************************
+        * GetMetrics()
+        *
+        * Description:
+        *   Returns the metrics of the updated tickers (see @Update).
+        *
+        * tickers -> list[str] (None) : tickers to select, all if None
+        * returns (pd.DataFrame) : (Ticker, Period) x metric frame
+        **************************************************** """
+
+        if tickers is None:
+            return self._metrics
+
+        return self._metrics[self._metrics.index.get_level_values('Ticker').isin(tickers)]
+
+    def ProjectFreeCashFlows(self, ticker: str, discountRate: float, years: int = 10, growth: float = None, terminalGrowth: float = 0.02) -> list:
+        """ ****************************************************
+        * ProjectFreeCashFlows()
+        *
+        * Description:
+        *   Projects the future free-cash-flows of a ticker from its most
+        *   recent FCF. The last element is the terminal value, as expected
+        *   by EnterpriseValue (see enterpriseDCFModel).
+        *
+        * ticker -> str                 : ticker to project
+        * discountRate -> float         : WACC used for the terminal value
+        * years -> int (10)             : explicit forecast years
+        * growth -> float (None)        : FCF growth rate, defaults to the average revenue
+        *                                 growth of the last 3 periods (clipped to [-10%, 20%])
+        * terminalGrowth -> float (0.02): perpetual growth rate of the terminal value
+        * returns (list[float]) : future free-cash-flows and terminal value, None if no FCF
+        * raises ValueError if the discount rate does not exceed the terminal growth rate
+        **************************************************** """
+
+        if discountRate <= terminalGrowth:
+            raise ValueError(f'Discount rate {discountRate} must exceed the terminal growth rate {terminalGrowth}')
+
+        metrics = self.GetMetrics([ticker]).sort_index()
+        fcf = metrics['FCF'].dropna()
+
+        if fcf.empty:
+            print(f'{self.ProjectFreeCashFlows.__name__}(): No free-cash-flow available for {ticker}...')
+            return None
+
+        if growth is None:
+            growth = metrics['RevenueGrowth'].dropna().tail(3).mean()
+            growth = 0.0 if pd.isna(growth) else float(np.clip(growth, -0.1, 0.2))
+
+        cashFlows = list(fcf.iloc[-1] * (1 + growth) ** np.arange(1, years + 1))
+        cashFlows.append(cashFlows[-1] * (1 + terminalGrowth) / (discountRate - terminalGrowth))
+
+        return cashFlows
+
+    def BuildEnterpriseValue(self, ticker: str, discountRate: float, midyearFactor: float = 1.0, **projection) -> EnterpriseValue:
+        """ ****************************************************
+        * BuildEnterpriseValue()
+        *
+        * Description:
+        *   Creates the EnterpriseValue inputs of a ticker: the projected
+        *   free-cash-flows, cash and short-term investments as
+        *   non-operating assets, and long-term debt as a liability.
+        *
+        * ticker -> str                 : ticker to value
+        * discountRate -> float         : WACC
+        * midyearFactor -> float (1.0)  : mid-year adjustment factor
+        * projection -> kwargs          : see @ProjectFreeCashFlows
+        * returns (EnterpriseValue) : model ready for calculateEnterpriseValue(), None if no FCF
+        **************************************************** """
+
+        cashFlows = self.ProjectFreeCashFlows(ticker, discountRate, **projection)
+        if cashFlows is None:
+            return None
+
+        latest = self.GetPanel([ticker]).sort_index().ffill().iloc[-1].fillna(0)
+
+        ev = EnterpriseValue(cashFlows, discountRate, midyearFactor)
+        ev.addNonOperatingAssets([latest['Cash'], latest['ShortTermInvestments']])
+        ev.addLiabilities([-latest['LongTermDebt']])
+
+        return ev
@@ -1,10 +1,11 @@
 # File Imports
-import time
 import pickle
 import re
 import warnings
 import pandas as pd
 import FinancialStatementReader as fsr
+import StatementHeaderMatcher as shm
+import LineItemTaxonomy as lit
 from bs4 import BeautifulSoup
 
 # File Settings
@@ -26,6 +27,68 @@ class FinancialStatementParser:
         "CONSOLIDATED STATEMENTS OF CASH FLOWS",
     ]
 
+    # Table header variants (synonyms) for each of the table headers
+    _TBL_HDR_VARIANTS = {
+        "CONSOLIDATED STATEMENTS OF OPERATIONS": [
+            "CONSOLIDATED STATEMENT OF OPERATIONS",
+            "STATEMENTS OF CONSOLIDATED OPERATIONS",
+            "STATEMENT OF CONSOLIDATED OPERATIONS",
+            "CONSOLIDATED STATEMENTS OF OPERATIONS AND COMPREHENSIVE INCOME",
+            "CONSOLIDATED STATEMENTS OF OPERATIONS AND COMPREHENSIVE LOSS",
+            "CONSOLIDATED STATEMENTS OF INCOME",
+            "CONSOLIDATED STATEMENT OF INCOME",
+            "STATEMENTS OF CONSOLIDATED INCOME",
+            "STATEMENT OF CONSOLIDATED INCOME",
+            "CONSOLIDATED INCOME STATEMENTS",
+            "CONSOLIDATED INCOME STATEMENT",
+            "CONSOLIDATED STATEMENTS OF EARNINGS",
+            "CONSOLIDATED STATEMENT OF EARNINGS",
+            "STATEMENTS OF CONSOLIDATED EARNINGS",
+        ],
+        "CONSOLIDATED BALANCE SHEETS": [
+            "CONSOLIDATED BALANCE SHEET",
+            "CONSOLIDATED STATEMENTS OF FINANCIAL POSITION",
+            "CONSOLIDATED STATEMENT OF FINANCIAL POSITION",
+            "CONSOLIDATED STATEMENTS OF FINANCIAL CONDITION",
+            "CONSOLIDATED STATEMENT OF FINANCIAL CONDITION",
+            "CONSOLIDATED STATEMENTS OF CONDITION",
+        ],
+        "CONSOLIDATED STATEMENTS OF COMPREHENSIVE INCOME": [
+            "CONSOLIDATED STATEMENT OF COMPREHENSIVE INCOME",
+            "STATEMENTS OF CONSOLIDATED COMPREHENSIVE INCOME",
+            "CONSOLIDATED STATEMENTS OF COMPREHENSIVE INCOME (LOSS)",
+            "CONSOLIDATED STATEMENT OF COMPREHENSIVE INCOME (LOSS)",
+            "CONSOLIDATED STATEMENTS OF COMPREHENSIVE LOSS",
+            "CONSOLIDATED STATEMENTS OF COMPREHENSIVE EARNINGS",
+        ],
+        "CONSOLIDATED STATEMENTS OF CASH FLOWS": [
+            "CONSOLIDATED STATEMENT OF CASH FLOWS",
+            "CONSOLIDATED STATEMENTS OF CASH FLOW",
+            "STATEMENTS OF CONSOLIDATED CASH FLOWS",
+            "STATEMENT OF CONSOLIDATED CASH FLOWS",
+            "CONSOLIDATED CASH FLOW STATEMENTS",
+            "CONSOLIDATED CASH FLOW STATEMENT",
+        ],
+    }
+
+    # Quarterly (10-Q) statements are usually titled "CONDENSED CONSOLIDATED ..."
+    _10Q_TBL_HDR_VARIANTS = {
+        hdr: variants + ["CONDENSED " + hdr] + ["CONDENSED " + variant for variant in variants]
+        for hdr, variants in _TBL_HDR_VARIANTS.items()
+    }
+
+    # Form types
+    _10K = '10-K'
+    _10Q = '10-Q'
+    _10KA = '10-K/A'
+
+    # Precompiled matcher over all table header variants (per form type)
+    _HEADER_MATCHERS = {
+        _10K: shm.StatementHeaderMatcher(_TBL_HDR_VARIANTS),
+        _10Q: shm.StatementHeaderMatcher(_10Q_TBL_HDR_VARIANTS),
+        _10KA: shm.StatementHeaderMatcher(_TBL_HDR_VARIANTS),
+    }
+
     # List of months in string format
     _MONTHS = [
         'January',
@@ -49,6 +112,18 @@ class FinancialStatementParser:
 
     _ZERO_CHARACTER = '—'
 
+    # Period header patterns: month name (or abbreviation), day and year (i.e.
+    # "Year Ended December 31, 2022", "December 31,2022", "Sept. 30, 2023"), or ISO dates
+    _PERIOD_MONTHS = {
+        'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6, 'july': 7,
+        'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12,
+        'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'jun': 6, 'jul': 7, 'aug': 8, 'sept': 9, 'sep': 9,
+        'oct': 10, 'nov': 11, 'dec': 12,
+    }
+    _PERIOD_PATTERN = re.compile(r'(' + '|'.join(sorted(_PERIOD_MONTHS, key=len, reverse=True)) + r')\.?\s*(\d{1,2})\s*,?\s*(\d{4})(?!\d)', re.IGNORECASE)
+    _ISO_PERIOD_PATTERN = re.compile(r'(?<!\d)(\d{4})-(\d{2})-(\d{2})(?!\d)')
+    _MIN_PERIOD_YEAR = 1900
+
     _DATABASE_DIR = "FS_DataBase\\"
 
     """
@@ -62,13 +137,24 @@ class FinancialStatementParser:
     * @param[in] request_cik(boolean)    - true to request all CIKs listed by the SEC,
     *                                      false otherwise.
     * @param[in] write_database(boolean) - true to write financials to DB, false otherwise
+    * @param[in] normalize_labels(boolean) - true to map the table row labels to the
+    *                                        canonical line item taxonomy, false otherwise
+    * @param[in] offline(boolean)          - true to serve filing lists from the local
+    *                                        submissions cache only, false otherwise
     """
-    def __init__(self, request_cik=False, write_database=False):
+    def __init__(self, request_cik=False, write_database=False, normalize_labels=False, offline=False):
         # Create the statement reader
-        self._financialStatementReader = fsr.FinancialStatementReader(request_cik)
+        self._financialStatementReader = fsr.FinancialStatementReader(request_cik, offline)
 
         self._write_database = write_database
 
+        # Line item normalizer (kept per parser so the label memo is shared across filings)
+        self._lineItemNormalizer = lit.LineItemNormalizer() if normalize_labels else None
+
+        # Matched table header variants (per form type and filing) of the last extraction
+        self._headerMatches = {}
+        self._lastHeaderMatches = {}
+
     """
     * _HasMonth(): private
     *
@@ -175,22 +261,43 @@ class FinancialStatementParser:
 
         return t_num
 
+    """
+    * _DatabaseFilename(): private
+    *
+    * Builds the database filename of the financials for a form type.
+    * The filename formatting follows:
+    *       'ticker_name'_financials.pickle             (10-K)
+    *       'ticker_name'_'form_type'_financials.pickle (other forms, i.e. AAPL_10Q)
+    *
+    * @param[in] ticker(str)   - ticker associated with the financials
+    * @param[in] formType(str) - form type of the financials
+    * @returns database filename
+    """
+    def _DatabaseFilename(self, ticker, formType):
+        if formType == self._10K:
+            filename = self._DATABASE_DIR + f"{ticker}_financials.pickle"
+        else:
+            form = formType.replace('-', '').replace('/', '')
+            filename = self._DATABASE_DIR + f"{ticker}_{form}_financials.pickle"
+
+        return filename
+
     """
     * _WriteFinancialsToDatabase(): private
     *
     * Writes the financial data to the database.
-    * The filename formatting follows:
-    *       'ticker_name'_financials.pickle
+    * For the filename formatting, see @_DatabaseFilename.
     *
     * @param[in] ticker(str) - ticker associated with the financials
     * @param[in] financials(dict) - financials to write to the DB
+    * @param[in] formType(str) - form type of the financials
     * @returns true if written, false otherwise
     """
-    def _WriteFinancialsToDatabase(self, ticker, financials):
+    def _WriteFinancialsToDatabase(self, ticker, financials, formType=_10K):
         status = True
 
         try:
-            filename = self._DATABASE_DIR + f"{ticker}_financials.pickle"
+            filename = self._DatabaseFilename(ticker, formType)
 
             with open(filename, 'wb') as file:
                 pickle.dump(financials, file)
@@ -207,13 +314,14 @@ class FinancialStatementParser:
     * Reads the financials from the databas , if available.
     *
     * @param[in] ticker(str) - ticker associated with the financials
+    * @param[in] formType(str) - form type of the financials
     * @returns dict of financials, None if read error
     """
-    def _ReadFinancialsFromDatabase(self, ticker):
+    def _ReadFinancialsFromDatabase(self, ticker, formType=_10K):
         data = None
 
         try:
-            filename = self._DATABASE_DIR + f"{ticker}_financials.pickle"
+            filename = self._DatabaseFilename(ticker, formType)
 
             with open(filename, 'rb') as file:
                 data = pickle.load(file)
@@ -261,21 +369,25 @@ class FinancialStatementParser:
     """
     * _ExtractTable(): private
     *
-    * Extract all financial statement tables from the given SEC filing.
+    * Extract the financial statement table following each of the given
+    * table header text nodes. A table following several header nodes (i.e. a
+    * title repeated in the page header) is only extracted once.
     *
-    * @param[in] financials(str) - financial document in string format
-    * @param[in] tableHeader(str) - name of the table in string format
+    * @param[in] headerNodes(list) - table header text nodes found in the SEC filing
     * @return financials_df (dataframe of the finacial tables)
     """
-    def _ExtractTable(self, financials, tableHeader):
-        # Convert the financials into a BeautifulSoup object and find table header
-        financialsContent = BeautifulSoup(financials, 'html')
-        bs = financialsContent.find_all(text=re.compile(tableHeader))
-
+    def _ExtractTable(self, headerNodes):
         table = []
-        for nextItem in bs:
+        extracted = set()
+        for nextItem in headerNodes:
             # find all table items in the BS object
-            for row in nextItem.find_next("table").find_all("tr"):
+            nextTable = nextItem.find_next("table")
+            if nextTable is None or id(nextTable) in extracted:
+                continue
+
+            extracted.add(id(nextTable))
+
+            for row in nextTable.find_all("tr"):
                 t = [cell.get_text(strip=True) for cell in row.find_all("td")] # extract the table row
                 t = self._ProcessRow(t)                                        # process/format the table row
 
@@ -317,62 +429,124 @@ class FinancialStatementParser:
     * _ReconstructFinancials(): private
     *
     * Reconstructs all financial statement tables from the SEC filing.
-    * For the list of table names, see @_TBL_HDRS.
+    * For the list of table names, see @_TBL_HDRS. The filing is parsed once
+    * and all header variants of the form type (see @_HEADER_MATCHERS) are matched
+    * in a single pass; the matched variants are kept in @_lastHeaderMatches.
+    * If label normalization is enabled, the tables are indexed by
+    * (Taxonomy, Category), see LineItemTaxonomy.LineItemNormalizer.
     *
     * @param[in] financials(str) - financial document in string format
+    * @param[in] formType(str)   - form type of the financial document
     * @return financialTables (dict of financial tables)
     """
-    def _ReconstructFinancials(self, financials):
+    def _ReconstructFinancials(self, financials, formType=_10K):
         # Dict keys are the table headers (names)
         financialTables = {}
+        self._lastHeaderMatches = {}
+
+        # Convert the financials into a BeautifulSoup object and find the table headers
+        financialsContent = BeautifulSoup(financials, 'html')
+        headers = self._HEADER_MATCHERS[formType].FindHeaders(financialsContent)
 
         for hdr in self._TBL_HDRS:
-            financialTables[hdr] = self._ExtractTable(financials, hdr)
+            financialTables[hdr] = None
+            self._lastHeaderMatches[hdr] = None
+
+            if hdr in headers:
+                financialTables[hdr] = self._ExtractTable(headers[hdr]['nodes'])
+                self._lastHeaderMatches[hdr] = headers[hdr]['variants']
+
+        if self._lineItemNormalizer is not None:
+            financialTables = self._lineItemNormalizer.NormalizeFinancials(financialTables)
 
         return financialTables
 
     """
-    * Extract10KFinancialStatementTables(): public
+    * ExtractFinancialStatementTables(): public
     *
-    * Extract the 10-K financial data tables from the SEC filing. The filings
-    * are all recent (historical) filings provided by the SEC.
-    * Requests the information, and calls the required parsing functions.
+    * Extract the financial data tables from the SEC filings of the given form
+    * types (see @_HEADER_MATCHERS). The filings are all recent (historical)
+    * filings provided by the SEC.
+    * The filing list is requested once for all form types, and every filing is
+    * fetched and parsed with the same machinery; only the table header
+    * variants differ per form type.
     *
-    * @param[in] ticker(str) - ticker to extract financial data
-    * @return historicalFilings (list of dicts for all historical filings)
+    * @param[in] ticker(str)      - ticker to extract financial data
+    * @param[in] formTypes(tuple) - form types to extract (i.e. ('10-K', '10-Q'))
+    * @return dict of historicalFilings by form type (list of dicts for all historical filings)
+    * @throws ValueError if a form type is not supported
     """
-    def Extract10KFinancialStatementTables(self, ticker):
-        _10K_filings = self._financialStatementReader.Get10KFilingList(ticker)
+    def ExtractFinancialStatementTables(self, ticker, formTypes=(_10K,)):
+        # Validate the form types before anything is requested
+        unsupported = [formType for formType in formTypes if formType not in self._HEADER_MATCHERS]
+        if len(unsupported) != 0:
+            raise ValueError(f'Unsupported form type(s) {unsupported}, supported: {list(self._HEADER_MATCHERS.keys())}')
+
+        formTypes = list(formTypes)
+        filings = self._financialStatementReader.GetFilingList(ticker, formTypes)
+
+        historicalFilings = {formType: [] for formType in formTypes}
+        self._headerMatches = {formType: [] for formType in formTypes}
+
+        if filings is None or len(filings) == 0:
+            print(f'Could not obtain filing list for: {ticker}')
+            return historicalFilings
 
-        cik = str(_10K_filings['accessionNumber'].iloc[0]).split('-')[0]
+        cik = str(filings['accessionNumber'].iloc[0]).split('-')[0]
 
-        historicalFilings = []
-        for idx in range(len(_10K_filings)):
-            # Extract the acession number and file name => for SEC request
-            accessionNumber = str(_10K_filings['accessionNumber'].iloc[idx])
-            fileName = str(_10K_filings['primaryDocument'].iloc[idx])
-            accessionNumber = accessionNumber.split('-')
-            accessionNumber = accessionNumber[0] + accessionNumber[1] + accessionNumber[2]
+        for idx in range(len(filings)):
+            # Extract the acession number, file name and form type => for SEC request
+            accessionNumber = str(filings['accessionNumber'].iloc[idx])
+            fileName = str(filings['primaryDocument'].iloc[idx])
+            formType = str(filings['form'].iloc[idx])
+            accessionNumber = accessionNumber.replace('-', '')
 
-            # Get the 10-K filing
-            filing10K = self._financialStatementReader.Get10KFinancials(accessionNumber, cik, fileName)
+            # Get the filing
+            filing = self._financialStatementReader.GetFiling(accessionNumber, cik, fileName)
 
             # Only process the filing if it exists
-            if filing10K is not None:
-                financials = self._ReconstructFinancials(filing10K)
+            if filing is not None:
+                financials = self._ReconstructFinancials(filing, formType)
+                self._headerMatches[formType].append(self._lastHeaderMatches)
             else:
                 financials = None
+                self._headerMatches[formType].append(None)
                 print(f'Could not obtain financials for: {fileName}')
 
-            historicalFilings.append(financials)
-
-            time.sleep(1)
+            historicalFilings[formType].append(financials)
 
         if self._write_database:
-            self._WriteFinancialsToDatabase(ticker, historicalFilings)
+            for formType in formTypes:
+                self._WriteFinancialsToDatabase(ticker, historicalFilings[formType], formType)
 
         return historicalFilings
 
+    """
+    * Extract10KFinancialStatementTables(): public
+    *
+    * Extract the 10-K financial data tables from the SEC filing. The filings
+    * are all recent (historical) filings provided by the SEC.
+    * See @ExtractFinancialStatementTables.
+    *
+    * @param[in] ticker(str) - ticker to extract financial data
+    * @return historicalFilings (list of dicts for all historical filings)
+    """
+    def Extract10KFinancialStatementTables(self, ticker):
+        return self.ExtractFinancialStatementTables(ticker, (self._10K,))[self._10K]
+
+    """
+    * ReadFinancials(): public
+    *
+    * Interface for reading the financial data of a form type located in the
+    * database, if the data exists.
+    *
+    * @param[in] ticker(str)   - ticker to indicate what data to read
+    * @param[in] formType(str) - form type to indicate what data to read
+    * @return dict of financials if read, None otherwise
+    """
+    def ReadFinancials(self, ticker, formType=_10K):
+        return self._ReadFinancialsFromDatabase(ticker, formType)
+
     """
     * Read10KFinancials(): public
     *
@@ -384,3 +558,49 @@ class FinancialStatementParser:
     """
     def Read10KFinancials(self, ticker):
         return self._ReadFinancialsFromDatabase(ticker)
+
+    """
+    * ParsePeriod(): public
+    *
+    * Parses the period end date of a table column header (see @_PERIOD_PATTERN).
+    * Headers without a full date (i.e. a bare "December 31,") or with a year
+    * before @_MIN_PERIOD_YEAR are not periods.
+    *
+    * @param[in] header(str) - table column header
+    * @return pd.Timestamp of the period end date, None if not a period
+    """
+    def ParsePeriod(self, header):
+        period = None
+        header = str(header)
+
+        match = self._ISO_PERIOD_PATTERN.search(header)
+        if match is not None:
+            year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
+
+        else:
+            match = self._PERIOD_PATTERN.search(header)
+            if match is not None:
+                year, month, day = int(match.group(3)), self._PERIOD_MONTHS[match.group(1).lower()], int(match.group(2))
+
+        if match is not None and year >= self._MIN_PERIOD_YEAR:
+            try:
+                period = pd.Timestamp(year=year, month=month, day=day)
+
+            except ValueError:
+                period = None
+
+        return period
+
+    """
+    * GetHeaderMatches(): public
+    *
+    * Reports which table header variant matched each of the financial
+    * statement tables, for every filing of the last extraction.
+    * The list is in the same order as the extracted historical filings.
+    *
+    * @param[in] formType(str) - form type of the filings
+    * @return list of dicts (table header => list of matched variants, None if
+    *         no variant matched), None entries for filings that were not obtained
+    """
+    def GetHeaderMatches(self, formType=_10K):
+        return self._headerMatches.get(formType, [])
@@ -1,4 +1,9 @@
 # File Imports
+import os
+import json
+import time
+import collections
+import threading
 import requests
 import settings
 import pandas as pd
@@ -20,9 +25,32 @@ import re
 class FinancialStatementReader:
     # SEC URLs
     _CIK_URL = "https://www.sec.gov/files/company_tickers.json"
+    _SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik}.json"
 
     # Class Constants
     _10K = '10-K'
+    _10Q = '10-Q'
+    _10KA = '10-K/A'
+
+    # Minimum interval between SEC requests in seconds (SEC fair access limit: 10 requests/second,
+    # kept at 8 requests/second for margin)
+    _REQUEST_INTERVAL = 0.125
+
+    # Local cache of the SEC submissions JSON (CIK##########.json)
+    _SUBMISSIONS_DIR = os.path.join("FS_DataBase", "submissions")
+
+    # Number of parsed submissions kept in memory (least recently used are dropped)
+    _RECENT_FILINGS_CACHE_SIZE = 64
+
+    # Columns of 'filings.recent' required to locate and request filings
+    _FILING_COLUMNS = [
+        'accessionNumber',
+        'filingDate',
+        'reportDate',
+        'form',
+        'primaryDocument',
+        'primaryDocDescription',
+    ]
 
     """
     * __init__(): private
@@ -33,11 +61,23 @@ class FinancialStatementReader:
     *
     * @param[in] request_cik(boolean) - true to request all CIKs listed by the SEC,
     *                                   false otherwise.
+    * @param[in] offline(boolean)     - true to serve submissions from the local cache
+    *                                   only (i.e. after a bulk archive ingestion),
+    *                                   false otherwise.
     """
-    def __init__(self, request_cik=False):
+    def __init__(self, request_cik=False, offline=False):
         # Define header for the SEC website request
         self._HEADER = {"User-Agent": f"{settings.WEBSITE} {settings.EMAIL}"}
 
+        self._offline = offline
+
+        # In-memory 'filings.recent' columns (see @_FILING_COLUMNS) by CIK, bounded LRU
+        self._recentFilings = collections.OrderedDict()
+
+        # Time slot of the last SEC request (see @_Throttle)
+        self._lastRequestTime = 0.0
+        self._throttleLock = threading.Lock()
+
         # If request CIK flag is true, request all CIKs from SEC
         if request_cik == True:
             self._RequestCIKFromSEC()
@@ -84,59 +124,265 @@ class FinancialStatementReader:
 
         # Loop through all tickers
         if ticker in self._CIK_DB['ticker'].to_list():
-            cik = str(self._CIK_DB.loc[(self._CIK_DB['ticker'] == ticker)]['cik_str'][0]) # Get the CIK from the database in string form
+            cik = str(self._CIK_DB.loc[(self._CIK_DB['ticker'] == ticker)]['cik_str'].iloc[0]) # Get the CIK from the database in string form
 
             cik = f"{cik:0>10}" # CIKs are 10 digits long and requre leading zeros
 
         return cik
 
     """
-    * Get10KFilingList(): public
+    * _Throttle(): private
+    *
+    * Waits until at least @_REQUEST_INTERVAL seconds have passed since the
+    * last SEC request, keeping the requests within the SEC rate limit.
+    * Each caller reserves its time slot under a lock, so concurrent threads
+    * sharing the reader are spaced out as well.
+    """
+    def _Throttle(self):
+        with self._throttleLock:
+            now = time.monotonic()
+            slot = max(now, self._lastRequestTime + self._REQUEST_INTERVAL)
+            self._lastRequestTime = slot
+
+        if slot > now:
+            time.sleep(slot - now)
+
+    """
+    * _RequestSubmissions(): private
+    *
+    * Requests the submissions JSON associated with the CIK. The JSON is cached
+    * locally (see @_SUBMISSIONS_DIR) and revalidated with the SEC using the
+    * ETag / Last-Modified headers of the cached copy, so unchanged submissions
+    * are answered with a 304 (Not Modified) and not downloaded again.
+    * Only the 'filings.recent' columns listed in @_FILING_COLUMNS are kept.
+    * In offline mode no request is made and the cached copy is used.
+    * If parsing is disabled, only the status is checked: a 304 reads nothing
+    * from the cache, and a 200 is written to the cache without being parsed.
+    *
+    * @param[in] cik(str)       - CIK associated with the company
+    * @param[in] parse(boolean) - true to return the parsed filings, false otherwise
+    * @return (dict of 'filings.recent' columns, None if unavailable or not parsed,
+    *          true if the submissions changed since the last request, false otherwise)
+    """
+    def _RequestSubmissions(self, cik, parse=True):
+        recent = None
+        modified = False
+
+        cacheFile = os.path.join(self._SUBMISSIONS_DIR, f"CIK{cik}.json")
+        metaFile = os.path.join(self._SUBMISSIONS_DIR, f"CIK{cik}.meta.json")
+
+        # Build the conditional request from the cached validators
+        header = dict(self._HEADER)
+        if not self._offline and os.path.isfile(cacheFile) and os.path.isfile(metaFile):
+            try:
+                with open(metaFile, 'r') as file:
+                    meta = json.load(file)
+
+                if meta.get('ETag'):
+                    header['If-None-Match'] = meta['ETag']
+                if meta.get('Last-Modified'):
+                    header['If-Modified-Since'] = meta['Last-Modified']
+
+            except Exception as e:
+                print(f'Could not read cached submissions metadata for CIK {cik}:\n{e}')
+
+        # Offline => no request, the cached submissions are used
+        if not self._offline:
+            try:
+                self._Throttle()
+                response = requests.get(self._SUBMISSIONS_URL.format(cik=cik), headers=header)
+
+                if response.status_code == 200:
+                    modified = True
+                    self._recentFilings.pop(cik, None)
+
+                    if parse:
+                        recent = self._ParseRecentFilings(response.content)
+
+                    # Write the submissions and validators to the cache
+                    os.makedirs(self._SUBMISSIONS_DIR, exist_ok=True)
+
+                    with open(cacheFile, 'wb') as file:
+                        file.write(response.content)
+
+                    with open(metaFile, 'w') as file:
+                        json.dump({
+                            'ETag': response.headers.get('ETag'),
+                            'Last-Modified': response.headers.get('Last-Modified'),
+                        }, file)
+
+                elif response.status_code != 304:
+                    print(f'Failed to obtain submissions for CIK {cik}: HTTP {response.status_code}')
+
+            except Exception as e:
+                print(f'Failed to obtain submissions for CIK {cik}:\n{e}')
+
+        if not parse:
+            return recent, modified
+
+        # Not modified (or request error) => use the cached submissions
+        if recent is None:
+            recent = self._recentFilings.get(cik)
+
+        if recent is None and os.path.isfile(cacheFile):
+            try:
+                with open(cacheFile, 'rb') as file:
+                    recent = self._ParseRecentFilings(file.read())
+
+            except Exception as e:
+                print(f'Could not read cached submissions for CIK {cik}:\n{e}')
+
+        if recent is not None:
+            self._recentFilings[cik] = recent
+            self._recentFilings.move_to_end(cik)
+
+            while len(self._recentFilings) > self._RECENT_FILINGS_CACHE_SIZE:
+                self._recentFilings.popitem(last=False)
+
+        return recent, modified
+
+    """
+    * _ParseRecentFilings(): private
+    *
+    * Parses the raw submissions JSON and keeps only the 'filings.recent'
+    * columns listed in @_FILING_COLUMNS.
+    *
+    * @param[in] content(bytes) - raw submissions JSON
+    * @return dict of 'filings.recent' columns (column name => list)
+    """
+    def _ParseRecentFilings(self, content):
+        recent = json.loads(content)['filings']['recent']
+
+        return {col: recent[col] for col in self._FILING_COLUMNS if col in recent}
+
+    """
+    * _FilterFilings(): private
+    *
+    * Selects the filings whose column value is one of the given values.
+    * Only the matching rows are copied into the dataframe, which keeps the
+    * row index of 'filings.recent'.
+    *
+    * @param[in] recent(dict) - 'filings.recent' columns
+    * @param[in] column(str)  - column to filter on
+    * @param[in] values(list) - accepted column values (i.e. ['10-K', '10-Q'])
+    * @return Dataframe of the matching filings
+    """
+    def _FilterFilings(self, recent, column, values):
+        rows = [idx for idx, value in enumerate(recent[column]) if value in values]
+
+        return pd.DataFrame({col: [recent[col][idx] for idx in rows] for col in recent}, index=rows)
+
+    """
+    * GetFilingList(): public
     *
-    * Extract the recent 10-K filing information with the associated ticker. The
-    * information is stored in a dataframe with the 'primaryDocument' column containing
-    * the 10-K file name.
+    * Extract the recent filing information of the given form types with the
+    * associated ticker. Filings are selected on the 'form' column, and the
+    * information is stored in a dataframe with the 'primaryDocument' column
+    * containing the filing file name.
     * If no filing exists, None is returned.
     *
-    * @param[in] ticker(str) - ticker name to extract the 10-K filing information
-    * @return Dataframe of 10-K filing information, None if DNE.
+    * @param[in] ticker(str)     - ticker name to extract the filing information
+    * @param[in] formTypes(list) - form types to extract (i.e. ['10-K', '10-Q'])
+    * @return Dataframe of filing information, None if DNE.
     """
-    def Get10KFilingList(self, ticker):
+    def GetFilingList(self, ticker, formTypes):
         filings = None
         cik = self._GetCIK(ticker) # get the CIK associated with the ticker
 
         # If the CIK is valid
         if cik != -1:
             # Get recent filings with the associated CIK
-            filings = requests.get(f"https://data.sec.gov/submissions/CIK{cik}.json", headers=self._HEADER).json()
+            recent, _ = self._RequestSubmissions(cik)
 
-            # Extract 10-K filings from rececnt filings
-            filings = pd.DataFrame(filings['filings']['recent'])
-            filings = filings.loc[filings['primaryDocDescription'] == self._10K]
+            # Extract the form type filings from rececnt filings
+            if recent is not None:
+                filings = self._FilterFilings(recent, 'form', formTypes)
 
         return filings
 
     """
-    * Get10KFinancials(): public
+    * Get10KFilingList(): public
     *
-    * Request the 10-K filing information given the input parameters.
+    * Extract the recent 10-K filing information with the associated ticker.
+    * See @GetFilingList.
+    *
+    * @param[in] ticker(str) - ticker name to extract the 10-K filing information
+    * @return Dataframe of 10-K filing information, None if DNE.
+    """
+    def Get10KFilingList(self, ticker):
+        return self.GetFilingList(ticker, [self._10K])
+
+    """
+    * CheckForNewFilings(): public
+    *
+    * Revalidates the cached submissions of each ticker with the SEC and reports
+    * the tickers whose submissions changed since the last request. Unchanged
+    * submissions are answered with a 304 (Not Modified) and are not downloaded.
+    * Only the status is checked; no submissions are parsed or kept in memory.
+    *
+    * @param[in] tickers(list) - tickers to check
+    * @return list of tickers with new (or changed) submissions
+    """
+    def CheckForNewFilings(self, tickers):
+        updated = []
+
+        for ticker in tickers:
+            cik = self._GetCIK(ticker)
+
+            if cik != -1:
+                _, modified = self._RequestSubmissions(cik, parse=False)
+
+                if modified:
+                    updated.append(ticker)
+
+        return updated
+
+    """
+    * GetFiling(): public
+    *
+    * Request the filing (of any form type) given the input parameters.
+    * Non-200 responses (i.e. the SEC throttle page, served with 429 or 403)
+    * are request errors.
     *
     * @param[in] acessionNumber(str) - accession number associated with the company
     * @param[in] cik(str)            - CIK associated with the company
-    * @param[in] fileName(str)       - 10-K file name associated with the comany
+    * @param[in] fileName(str)       - filing file name associated with the comany
     * @return string of raw text from the filing, None if request error
     """
-    def Get10KFinancials(self, accessionNumber, cik, fileName):
+    def GetFiling(self, accessionNumber, cik, fileName):
         # Construct the filing URL
         filingURL = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accessionNumber}/{fileName}"
 
         try:
             # Request the filing and extract the raw text
+            self._Throttle()
             filing = requests.get(filingURL, headers=self._HEADER)
-            filing = filing.text
+
+            if filing.status_code in (403, 429):
+                print(f'Throttled by the SEC while requesting filing {accessionNumber}: HTTP {filing.status_code}')
+                filing = None
+            elif filing.status_code != 200:
+                print(f'Failed to obtain filing {accessionNumber}: HTTP {filing.status_code}')
+                filing = None
+            else:
+                filing = filing.text
 
         except Exception as e:
             filing = None
-            print(f'Failed to obtain and parse 10K filing: \n{e}')
+            print(f'Failed to obtain and parse filing: \n{e}')
 
         return filing
+
+    """
+    * Get10KFinancials(): public
+    *
+    * Request the 10-K filing information given the input parameters.
+    * See @GetFiling.
+    *
+    * @param[in] acessionNumber(str) - accession number associated with the company
+    * @param[in] cik(str)            - CIK associated with the company
+    * @param[in] fileName(str)       - 10-K file name associated with the comany
+    * @return string of raw text from the filing, None if request error
+    """
+    def Get10KFinancials(self, accessionNumber, cik, fileName):
+        return self.GetFiling(accessionNumber, cik, fileName)
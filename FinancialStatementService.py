@@ -0,0 +1,427 @@
+import os
+import json
+import time
+import argparse
+import threading
+import collections
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import FinancialStatementParser as fsp
+import FinancialMetricsEngine as fme
+
+class _LRUCache:
+    """ ****************************************************
+    * _LRUCache
+    *
+    * Description:
+    *   Thread-safe least-recently-used cache with an optional
+    *   time-to-live per entry.
+    **************************************************** """
+
+    def __init__(self, capacity: int, ttl: float = None) -> None:
+        """ ****************************************************
+        * __init__()
+        *
+        * Description:
+        *   Creates an empty cache.
+        *
+        * capacity -> int      : maximum number of entries
+        * ttl -> float (None)  : entry time-to-live in seconds, None for no expiry
+        **************************************************** """
+
+        self._capacity = capacity
+        self._ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def Get(self, key):
+        """ ****************************************************
+        * Get()
+        *
+        * Description:
+        *   Returns a cached value and marks it as most recently used.
+        *
+        * key -> hashable : cache key
+        * returns (any) : cached value, None if missing or expired
+        **************************************************** """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            if self._ttl is not None and time.monotonic() - entry[0] > self._ttl:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def Put(self, key, value) -> None:
+        """ ****************************************************
+        * Put()
+        *
+        * Description:
+        *   Caches a value, evicting the least recently used entry when full.
+        *
+        * key -> hashable : cache key
+        * value -> any    : value to cache
+        **************************************************** """
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+
+class FinancialStatementService:
+    """ ****************************************************
+    * FinancialStatementService
+    *
+    * Description:
+    *   Long-running HTTP service for the parsed statements, derived
+    *   metrics and DCF valuations. The CIK index, the metrics panel
+    *   and the statements of recently requested tickers stay in
+    *   memory between requests.
+    *
+    *   Responses are kept in an LRU cache, and concurrent identical
+    *   requests are coalesced so that only one of them is computed.
+    *
+    *   Endpoints (GET, JSON responses):
+    *     /statements?ticker=AAPL[&form=10-K][&filing=0]
+    *     /metrics?ticker=AAPL[&form=10-K]
+    *     /valuation?ticker=AAPL&discount_rate=0.08[&shares=][&years=10][&terminal_growth=0.02][&midyear_factor=1.0]
+    *     /stats
+    **************************************************** """
+
+    def __init__(self, statement_cache_size: int = 256, response_cache_size: int = 1024, response_ttl: float = 300.0) -> None:
+        """ ****************************************************
+        * __init__()
+        *
+        * Description:
+        *   Loads the CIK index (parser) and the metrics cache once.
+        *
+        * statement_cache_size -> int (256)  : tickers' statements held in memory
+        * response_cache_size -> int (1024)  : cached responses
+        * response_ttl -> float (300.0)      : response time-to-live in seconds
+        **************************************************** """
+
+        self._parser = fsp.FinancialStatementParser()
+        self._metricsEngines = {}
+
+        self._statements = _LRUCache(statement_cache_size)
+        self._responses = _LRUCache(response_cache_size, response_ttl)
+
+        # Request coalescing: request key => (completion event, [status, body])
+        self._inFlight = {}
+        self._lock = threading.Lock()
+
+        # The metrics engines update a shared panel, so their calls are serialized
+        self._metricsLock = threading.Lock()
+
+        # Latency metrics
+        self._latencies = collections.defaultdict(lambda: collections.deque(maxlen=1000))
+        self._counters = collections.Counter()
+
+        # Endpoint => (handler, required query parameters)
+        self._routes = {
+            '/statements': (self._Statements, ['ticker']),
+            '/metrics': (self._Metrics, ['ticker']),
+            '/valuation': (self._Valuation, ['ticker', 'discount_rate']),
+        }
+
+    def _GetMetricsEngine(self, formType: str) -> fme.FinancialMetricsEngine:
+        """ ****************************************************
+        * _GetMetricsEngine()
+        *
+        * Description:
+        *   Returns the (lazily created) metrics engine of a form type.
+        *
+        * formType -> str : form type of the stored financials
+        * returns (FinancialMetricsEngine) : metrics engine
+        **************************************************** """
+
+        with self._lock:
+            if formType not in self._metricsEngines:
+                self._metricsEngines[formType] = fme.FinancialMetricsEngine(formType)
+
+            return self._metricsEngines[formType]
+
+    def _GetFinancials(self, ticker: str, formType: str) -> list:
+        """ ****************************************************
+        * _GetFinancials()
+        *
+        * Description:
+        *   Returns the stored financials of a ticker. The database is read
+        *   on the first request, after eviction, or once the database file
+        *   was modified (entries are keyed on its modification time).
+        *
+        * ticker -> str   : ticker to read
+        * formType -> str : form type to read
+        * returns (list[dict]) : historical filings, None if unavailable
+        **************************************************** """
+
+        filename = self._parser._DatabaseFilename(ticker, formType)
+        if not os.path.isfile(filename):
+            return None
+
+        key = (ticker, formType, os.path.getmtime(filename))
+        financials = self._statements.Get(key)
+
+        if financials is None:
+            financials = self._parser.ReadFinancials(ticker, formType)
+
+            if financials is not None:
+                self._statements.Put(key, financials)
+
+        return financials
+
+    def _DatabaseSignature(self, params: dict) -> float:
+        """ ****************************************************
+        * _DatabaseSignature()
+        *
+        * Description:
+        *   Modification time of the database file a request reads, so that
+        *   cached responses are not served once the file was rewritten.
+        *
+        * params -> dict : query parameters
+        * returns (float) : database file modification time, None if no database file
+        **************************************************** """
+
+        filename = self._parser._DatabaseFilename(params['ticker'], params.get('form', '10-K'))
+
+        return os.path.getmtime(filename) if os.path.isfile(filename) else None
+
+    def _Statements(self, params: dict) -> (int, dict):
+        """ ****************************************************
+        * _Statements()
+        *
+        * Description:
+        *   Statement tables of one stored filing (0 = most recent).
+        *
+        * params -> dict : query parameters
+        * returns (int, dict) : HTTP status and response
+        **************************************************** """
+
+        ticker = params['ticker']
+        formType = params.get('form', '10-K')
+        filing = int(params.get('filing', 0))
+
+        financials = self._GetFinancials(ticker, formType)
+        if financials is None or not 0 <= filing < len(financials) or financials[filing] is None:
+            return 404, {'error': f'No {formType} financials for {ticker} (filing {filing})'}
+
+        return 200, {
+            hdr: None if table is None else json.loads(table.to_json(orient='split', date_format='iso'))
+            for hdr, table in financials[filing].items()
+        }
+
+    def _Metrics(self, params: dict) -> (int, dict):
+        """ ****************************************************
+        * _Metrics()
+        *
+        * Description:
+        *   Derived metrics of a ticker, per period.
+        *
+        * params -> dict : query parameters
+        * returns (int, dict) : HTTP status and response
+        **************************************************** """
+
+        ticker = params['ticker']
+        engine = self._GetMetricsEngine(params.get('form', '10-K'))
+
+        with self._metricsLock:
+            metrics = engine.Update([ticker])
+
+        if metrics.empty:
+            return 404, {'error': f'No metrics for {ticker}'}
+
+        metrics = metrics.droplevel('Ticker')
+        metrics.index = metrics.index.astype(str)
+
+        return 200, json.loads(metrics.to_json(orient='index'))
+
+    def _Valuation(self, params: dict) -> (int, dict):
+        """ ****************************************************
+        * _Valuation()
+        *
+        * Description:
+        *   DCF valuation of a ticker (see FinancialMetricsEngine.BuildEnterpriseValue).
+        *
+        * params -> dict : query parameters
+        * returns (int, dict) : HTTP status and response
+        **************************************************** """
+
+        ticker = params['ticker']
+        engine = self._GetMetricsEngine(params.get('form', '10-K'))
+
+        projection = {}
+        if 'years' in params:
+            projection['years'] = int(params['years'])
+        if 'growth' in params:
+            projection['growth'] = float(params['growth'])
+        if 'terminal_growth' in params:
+            projection['terminalGrowth'] = float(params['terminal_growth'])
+
+        with self._metricsLock:
+            engine.Update([ticker])
+            ev = engine.BuildEnterpriseValue(ticker, float(params['discount_rate']), float(params.get('midyear_factor', 1.0)), **projection)
+        if ev is None:
+            return 404, {'error': f'No free-cash-flow available for {ticker}'}
+
+        value, perShare = ev.calculateEnterpriseValue(int(params.get('shares', -1)))
+
+        return 200, {'ticker': ticker, 'enterpriseValue': float(value), 'perShare': perShare, 'freeCashFlows': [float(cf) for cf in ev._freeCashFlows]}
+
+    def _Stats(self) -> dict:
+        """ ****************************************************
+        * _Stats()
+        *
+        * Description:
+        *   Latency (milliseconds) and cache metrics per endpoint.
+        *
+        * returns (dict) : service metrics
+        **************************************************** """
+
+        with self._lock:
+            stats = {'counters': dict(self._counters), 'latency_ms': {}}
+            latencies = {path: sorted(samples) for path, samples in self._latencies.items()}
+
+        for path, ordered in latencies.items():
+
+            if len(ordered) != 0:
+                stats['latency_ms'][path] = {
+                    'count': len(ordered),
+                    'mean': sum(ordered) / len(ordered),
+                    'p50': ordered[len(ordered) // 2],
+                    'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                    'max': ordered[-1],
+                }
+
+        return stats
+
+    def Handle(self, path: str, params: dict) -> (int, bytes):
+        """ ****************************************************
+        * Handle()
+        *
+        * Description:
+        *   Serves a request from the response cache, by waiting on an
+        *   identical request in flight, or by computing it. Responses are
+        *   keyed on the query parameters and the modification time of the
+        *   ticker's database file.
+        *
+        * path -> str    : request path
+        * params -> dict : query parameters
+        * returns (int, bytes) : HTTP status and JSON body
+        **************************************************** """
+
+        start = time.perf_counter()
+
+        if path == '/stats':
+            return 200, json.dumps(self._Stats()).encode()
+
+        if path not in self._routes:
+            return 404, json.dumps({'error': f'Unknown endpoint {path}'}).encode()
+
+        handler, required = self._routes[path]
+
+        missing = [param for param in required if param not in params]
+        if len(missing) != 0:
+            return 400, json.dumps({'error': f'Missing parameter(s) {missing}'}).encode()
+
+        key = (path, tuple(sorted(params.items())), self._DatabaseSignature(params))
+
+        response = self._responses.Get(key)
+        if response is not None:
+            with self._lock:
+                self._counters['cache_hits'] += 1
+
+        else:
+            with self._lock:
+                inFlight = self._inFlight.get(key)
+                owner = inFlight is None
+
+                if owner:
+                    inFlight = (threading.Event(), [500, b''])
+                    self._inFlight[key] = inFlight
+                    self._counters['cache_misses'] += 1
+                else:
+                    self._counters['coalesced'] += 1
+
+            event, response = inFlight
+
+            if owner:
+                try:
+                    status, body = handler(params)
+                    response[:] = [status, json.dumps(body).encode()]
+
+                    if status == 200:
+                        self._responses.Put(key, response)
+
+                except ValueError as e:
+                    response[:] = [400, json.dumps({'error': f'Invalid parameter: {e}'}).encode()]
+
+                except Exception as e:
+                    response[:] = [500, json.dumps({'error': str(e)}).encode()]
+
+                finally:
+                    with self._lock:
+                        del self._inFlight[key]
+
+                    event.set()
+
+            else:
+                event.wait()
+
+        with self._lock:
+            self._latencies[path].append((time.perf_counter() - start) * 1000)
+
+        return response[0], response[1]
+
+    def Serve(self, host: str = '127.0.0.1', port: int = 8080) -> None:
+        """ ****************************************************
+        * Serve()
+        *
+        * Description:
+        *   Serves requests until interrupted.
+        *
+        * host -> str (127.0.0.1) : bind address
+        * port -> int (8080)      : bind port
+        **************************************************** """
+
+        service = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+                status, body = service.Handle(url.path, params)
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), RequestHandler)
+        print(f'Serving on http://{host}:{port}')
+
+        try:
+            server.serve_forever()
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            server.server_close()
+
+if __name__ == '__main__':
+    args = argparse.ArgumentParser(description='Serve parsed statements, metrics and valuations over HTTP.')
+    args.add_argument('--host', default='127.0.0.1', help='bind address')
+    args.add_argument('--port', default=8080, type=int, help='bind port')
+    args = args.parse_args()
+
+    FinancialStatementService().Serve(args.host, args.port)
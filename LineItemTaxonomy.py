@@ -0,0 +1,405 @@
+import re
+import difflib
+import pandas as pd
+
+class LineItemNormalizer:
+    """ ****************************************************
+    * LineItemNormalizer
+    *
+    * Description:
+    *   Maps the free-text row labels (Category index) of the
+    *   extracted financial statement tables to a canonical line
+    *   item taxonomy (i.e. Revenue, COGS, CFO, CapEx).
+    *
+    *   Labels are resolved through three tiers of a precomputed
+    *   index: exact, normalized (case, punctuation and parenthetical
+    *   qualifiers removed) and fuzzy. Resolved labels are memoized,
+    *   so each distinct label is only matched once.
+    **************************************************** """
+
+    # Canonical line item => list of known labels
+    _TAXONOMY = {
+        # Income statement
+        'Revenue': [
+            'Revenue', 'Revenues', 'Total revenue', 'Total revenues', 'Net revenue', 'Net revenues',
+            'Total net revenue', 'Total net revenues', 'Net sales', 'Total net sales', 'Sales',
+        ],
+        'COGS': [
+            'Cost of revenue', 'Cost of revenues', 'Total cost of revenue', 'Total cost of revenues',
+            'Cost of sales', 'Total cost of sales', 'Cost of goods sold', 'Cost of products sold',
+        ],
+        'GrossProfit': ['Gross profit', 'Gross margin', 'Total gross margin'],
+        'ResearchAndDevelopment': ['Research and development', 'Research and development expenses'],
+        'SGA': [
+            'Selling, general and administrative', 'Selling, general and administrative expenses',
+            'General and administrative', 'Sales and marketing',
+        ],
+        'OperatingExpenses': [
+            'Operating expenses', 'Total operating expenses', 'Costs and expenses', 'Total costs and expenses',
+        ],
+        'OperatingIncome': [
+            'Operating income', 'Operating income (loss)', 'Operating loss', 'Income from operations',
+            'Income (loss) from operations', 'Loss from operations',
+        ],
+        'InterestExpense': ['Interest expense', 'Interest expense, net'],
+        'PretaxIncome': [
+            'Income before income taxes', 'Income (loss) before income taxes',
+            'Income before provision for income taxes', 'Earnings before income taxes',
+        ],
+        'IncomeTax': [
+            'Provision for income taxes', 'Provision for (benefit from) income taxes',
+            'Income tax expense', 'Income taxes',
+        ],
+        'NetIncome': ['Net income', 'Net income (loss)', 'Net loss', 'Net earnings'],
+        'EPSBasic': [
+            'Basic earnings per share', 'Earnings per share, basic', 'Net income per share, basic',
+            'Basic net income per share',
+        ],
+        'EPSDiluted': [
+            'Diluted earnings per share', 'Earnings per share, diluted', 'Net income per share, diluted',
+            'Diluted net income per share',
+        ],
+        'ComprehensiveIncome': ['Comprehensive income', 'Total comprehensive income'],
+
+        # Balance sheet
+        'Cash': ['Cash and cash equivalents', 'Cash and equivalents', 'Cash'],
+        'ShortTermInvestments': ['Short-term investments', 'Marketable securities', 'Current marketable securities'],
+        'AccountsReceivable': ['Accounts receivable', 'Accounts receivable, net'],
+        'Inventory': ['Inventories', 'Inventory'],
+        'CurrentAssets': ['Total current assets'],
+        'PPE': ['Property, plant and equipment, net', 'Property and equipment, net'],
+        'Goodwill': ['Goodwill'],
+        'TotalAssets': ['Total assets'],
+        'AccountsPayable': ['Accounts payable'],
+        'CurrentLiabilities': ['Total current liabilities'],
+        'LongTermDebt': ['Long-term debt', 'Long-term debt, net of current portion', 'Term debt', 'Non-current term debt'],
+        'TotalLiabilities': ['Total liabilities'],
+        'TotalEquity': ["Total stockholders' equity", "Total shareholders' equity", 'Total equity'],
+        'LiabilitiesAndEquity': [
+            "Total liabilities and stockholders' equity", "Total liabilities and shareholders' equity",
+            'Total liabilities and equity',
+        ],
+
+        # Cash flow statement
+        'DepreciationAndAmortization': ['Depreciation and amortization', 'Depreciation, amortization and other'],
+        'StockCompensation': ['Stock-based compensation', 'Stock-based compensation expense', 'Share-based compensation expense'],
+        'CFO': [
+            'Net cash provided by operating activities', 'Net cash provided by (used in) operating activities',
+            'Net cash used in operating activities', 'Net cash (used in) provided by operating activities',
+            'Net cash from operating activities', 'Net cash from (used in) operating activities',
+            'Cash provided by operating activities', 'Cash used in operating activities',
+            'Cash generated by operating activities', 'Cash generated by (used in) operating activities',
+        ],
+        'CapEx': [
+            'Capital expenditures', 'Purchases of property and equipment', 'Purchases of property, plant and equipment',
+            'Payments for acquisition of property, plant and equipment', 'Additions to property and equipment',
+        ],
+        'CFI': [
+            'Net cash used in investing activities', 'Net cash provided by (used in) investing activities',
+            'Net cash provided by investing activities', 'Net cash (used in) provided by investing activities',
+            'Net cash from investing activities', 'Net cash from (used in) investing activities',
+            'Cash provided by investing activities', 'Cash used in investing activities',
+            'Cash generated by investing activities', 'Cash generated by (used in) investing activities',
+        ],
+        'CFF': [
+            'Net cash used in financing activities', 'Net cash provided by (used in) financing activities',
+            'Net cash provided by financing activities', 'Net cash (used in) provided by financing activities',
+            'Net cash from financing activities', 'Net cash from (used in) financing activities',
+            'Cash provided by financing activities', 'Cash used in financing activities',
+            'Cash generated by financing activities', 'Cash generated by (used in) financing activities',
+        ],
+        'Dividends': ['Dividends paid', 'Cash dividends paid', 'Payments for dividends and dividend equivalents'],
+        'ShareRepurchases': ['Repurchases of common stock', 'Repurchase of common stock', 'Purchases of treasury stock'],
+    }
+
+    # us-gaap (XBRL) concept => canonical line item, for the SEC companyfacts data
+    _CONCEPTS = {
+        'Revenues': 'Revenue',
+        'RevenueFromContractWithCustomerExcludingAssessedTax': 'Revenue',
+        'RevenueFromContractWithCustomerIncludingAssessedTax': 'Revenue',
+        'SalesRevenueNet': 'Revenue',
+        'CostOfRevenue': 'COGS',
+        'CostOfGoodsAndServicesSold': 'COGS',
+        'CostOfGoodsSold': 'COGS',
+        'GrossProfit': 'GrossProfit',
+        'ResearchAndDevelopmentExpense': 'ResearchAndDevelopment',
+        'SellingGeneralAndAdministrativeExpense': 'SGA',
+        'OperatingExpenses': 'OperatingExpenses',
+        'CostsAndExpenses': 'OperatingExpenses',
+        'OperatingIncomeLoss': 'OperatingIncome',
+        'InterestExpense': 'InterestExpense',
+        'IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest': 'PretaxIncome',
+        'IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments': 'PretaxIncome',
+        'IncomeTaxExpenseBenefit': 'IncomeTax',
+        'NetIncomeLoss': 'NetIncome',
+        'ProfitLoss': 'NetIncome',
+        'EarningsPerShareBasic': 'EPSBasic',
+        'EarningsPerShareDiluted': 'EPSDiluted',
+        'ComprehensiveIncomeNetOfTax': 'ComprehensiveIncome',
+        'CashAndCashEquivalentsAtCarryingValue': 'Cash',
+        'ShortTermInvestments': 'ShortTermInvestments',
+        'MarketableSecuritiesCurrent': 'ShortTermInvestments',
+        'AccountsReceivableNetCurrent': 'AccountsReceivable',
+        'InventoryNet': 'Inventory',
+        'AssetsCurrent': 'CurrentAssets',
+        'PropertyPlantAndEquipmentNet': 'PPE',
+        'Goodwill': 'Goodwill',
+        'Assets': 'TotalAssets',
+        'AccountsPayableCurrent': 'AccountsPayable',
+        'LiabilitiesCurrent': 'CurrentLiabilities',
+        'LongTermDebtNoncurrent': 'LongTermDebt',
+        'Liabilities': 'TotalLiabilities',
+        'StockholdersEquity': 'TotalEquity',
+        'StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest': 'TotalEquity',
+        'LiabilitiesAndStockholdersEquity': 'LiabilitiesAndEquity',
+        'DepreciationDepletionAndAmortization': 'DepreciationAndAmortization',
+        'DepreciationAndAmortization': 'DepreciationAndAmortization',
+        'ShareBasedCompensation': 'StockCompensation',
+        'NetCashProvidedByUsedInOperatingActivities': 'CFO',
+        'PaymentsToAcquirePropertyPlantAndEquipment': 'CapEx',
+        'NetCashProvidedByUsedInInvestingActivities': 'CFI',
+        'NetCashProvidedByUsedInFinancingActivities': 'CFF',
+        'PaymentsOfDividends': 'Dividends',
+        'PaymentsOfDividendsCommonStock': 'Dividends',
+        'PaymentsForRepurchaseOfCommonStock': 'ShareRepurchases',
+    }
+
+    # Precompiled label normalization patterns
+    _PARENTHETICAL = re.compile(r'\([^)]*\)')
+    _APOSTROPHES = re.compile(r"['’]")
+    _NON_ALPHANUMERIC = re.compile(r'[^a-z0-9]+')
+    _NON_PREFIX = re.compile(r'\bnon ')
+
+    # Tokens a fuzzy match may not add, drop or swap (i.e. "Other current assets"
+    # must not become "Total current assets")
+    _OPPOSING_TOKENS = [
+        {'operating', 'investing', 'financing'},
+        {'current', 'noncurrent'},
+        {'other', 'total'},
+        {'basic', 'diluted'},
+        {'gross', 'net'},
+    ]
+
+    # Qualified labels that are only matched exactly or normalized, never as fuzzy
+    # candidates (i.e. "long term debt net of current portion" would otherwise
+    # pass the current/noncurrent guard for "Long-term debt, current portion")
+    _FUZZY_EXCLUDED = re.compile(r'\bnet of\b')
+
+    # Match tiers (see @MatchTier)
+    EXACT = 'exact'
+    NORMALIZED = 'normalized'
+    FUZZY = 'fuzzy'
+
+    def __init__(self, fuzzy_cutoff: float = 0.85, ambiguity_margin: float = 0.03) -> None:
+        """ ****************************************************
+        * __init__()
+        *
+        * Description:
+        *   Precomputes the exact and normalized label indices.
+        *
+        * fuzzy_cutoff -> float (0.85)     : minimum similarity ratio [0, 1] for
+        *                                    a fuzzy match
+        * ambiguity_margin -> float (0.03) : a fuzzy match is rejected when another
+        *                                    line item scores within this margin
+        **************************************************** """
+
+        self._fuzzyCutoff = fuzzy_cutoff
+        self._ambiguityMargin = ambiguity_margin
+
+        self._exactIndex = {}
+        self._normalizedIndex = {}
+
+        for canonical, labels in self._TAXONOMY.items():
+            for label in [canonical] + labels:
+                self._exactIndex.setdefault(label, canonical)
+                self._normalizedIndex.setdefault(self._NormalizeLabel(label), canonical)
+
+        self._normalizedLabels = [label for label in self._normalizedIndex.keys() if not self._FUZZY_EXCLUDED.search(label)]
+
+        # Raw label => (canonical line item, match tier), (None, None) if unmatched
+        self._memo = {}
+
+    def _NormalizeLabel(self, label: str) -> str:
+        """ ****************************************************
+        * _NormalizeLabel()
+        *
+        * Description:
+        *   Lower-cases the label, removes parenthetical qualifiers and
+        *   footnote markers (i.e. "(loss)", "(1)"), apostrophes and
+        *   punctuation, and collapses whitespace. "Non-current" and
+        *   "non current" are both written as "noncurrent".
+        *
+        * label -> str : raw row label
+        * returns (str) : normalized label
+        **************************************************** """
+
+        label = label.lower().replace('&', ' and ')
+        label = self._PARENTHETICAL.sub(' ', label)
+        label = self._APOSTROPHES.sub('', label)
+        label = self._NON_ALPHANUMERIC.sub(' ', label)
+        label = self._NON_PREFIX.sub('non', label)
+
+        return label.strip()
+
+    def _FuzzyMatch(self, normalized: str) -> str:
+        """ ****************************************************
+        * _FuzzyMatch()
+        *
+        * Description:
+        *   Fuzzy tier. Scores the normalized label against the label
+        *   index, skipping candidates that differ in any group of
+        *   opposing tokens (see @_OPPOSING_TOKENS) and qualified labels
+        *   (see @_FUZZY_EXCLUDED). The best candidate is
+        *   only accepted if no other line item scores within the
+        *   ambiguity margin, as a wrong mapping is worse than none.
+        *
+        * normalized -> str : normalized row label
+        * returns (str) : canonical line item, None if unmatched or ambiguous
+        **************************************************** """
+
+        tokens = set(normalized.split())
+        scores = {}
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(normalized)
+
+        for candidate in self._normalizedLabels:
+            candidateTokens = set(candidate.split())
+
+            if any(tokens & group != candidateTokens & group for group in self._OPPOSING_TOKENS):
+                continue
+
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() < self._fuzzyCutoff or matcher.quick_ratio() < self._fuzzyCutoff:
+                continue
+
+            score = matcher.ratio()
+            if score >= self._fuzzyCutoff:
+                canonical = self._normalizedIndex[candidate]
+                scores[canonical] = max(score, scores.get(canonical, 0.0))
+
+        ranked = sorted(scores.values(), reverse=True)
+
+        if len(ranked) == 0 or (len(ranked) > 1 and ranked[0] - ranked[1] < self._ambiguityMargin):
+            return None
+
+        return max(scores, key=scores.get)
+
+    def _Resolve(self, label: str) -> (str, str):
+        """ ****************************************************
+        * _Resolve()
+        *
+        * Description:
+        *   Resolves a raw row label through the exact, normalized and
+        *   fuzzy tiers, memoizing the result.
+        *
+        * label -> str : raw row label
+        * returns (str, str) : canonical line item and match tier,
+        *                      (None, None) if unmatched
+        **************************************************** """
+
+        label = str(label)
+
+        if label in self._memo:
+            return self._memo[label]
+
+        canonical, tier = self._exactIndex.get(label.strip()), self.EXACT
+
+        if canonical is None:
+            normalized = self._NormalizeLabel(label)
+            canonical, tier = self._normalizedIndex.get(normalized), self.NORMALIZED
+
+            if canonical is None and normalized != '':
+                canonical, tier = self._FuzzyMatch(normalized), self.FUZZY
+
+        result = (canonical, tier if canonical is not None else None)
+        self._memo[label] = result
+
+        return result
+
+    def Normalize(self, label: str) -> str:
+        """ ****************************************************
+        * Normalize()
+        *
+        * Description:
+        *   Maps a single raw row label to its canonical line item.
+        *
+        * label -> str : raw row label
+        * returns (str) : canonical line item, None if unmatched
+        **************************************************** """
+
+        return self._Resolve(label)[0]
+
+    def MatchTier(self, label: str) -> str:
+        """ ****************************************************
+        * MatchTier()
+        *
+        * Description:
+        *   Reports the tier that resolved a raw row label, so callers can
+        *   prefer exact and normalized matches over fuzzy ones.
+        *
+        * label -> str : raw row label
+        * returns (str) : EXACT, NORMALIZED or FUZZY, None if unmatched
+        **************************************************** """
+
+        return self._Resolve(label)[1]
+
+    def NormalizeConcept(self, concept: str) -> str:
+        """ ****************************************************
+        * NormalizeConcept()
+        *
+        * Description:
+        *   Maps a us-gaap concept name (i.e. "AssetsCurrent") to its
+        *   canonical line item. Concepts are matched exactly; their
+        *   free-text labels are not reliable enough to normalize.
+        *
+        * concept -> str : us-gaap concept name
+        * returns (str) : canonical line item, None if unmatched
+        **************************************************** """
+
+        return self._CONCEPTS.get(concept)
+
+    def NormalizeTable(self, table: pd.DataFrame) -> pd.DataFrame:
+        """ ****************************************************
+        * NormalizeTable()
+        *
+        * Description:
+        *   Normalizes all row labels of an extracted financial statement
+        *   table. Each distinct label is resolved once, and the result is
+        *   returned with a (Taxonomy, Category) index so that tables from
+        *   different filers can be joined on the Taxonomy level.
+        *
+        * table -> pd.DataFrame : extracted table (Category index)
+        * returns (pd.DataFrame) : copy of the table with a (Taxonomy, Category) index,
+        *                          None if the table is None
+        **************************************************** """
+
+        if table is None:
+            return None
+
+        categories = table.index
+        if isinstance(categories, pd.MultiIndex):
+            categories = categories.get_level_values('Category')
+
+        mapping = {label: self.Normalize(label) for label in pd.unique(categories)}
+
+        normalized = table.copy()
+        normalized.index = pd.MultiIndex.from_arrays(
+            [categories.map(mapping), categories],
+            names=['Taxonomy', 'Category'],
+        )
+
+        return normalized
+
+    def NormalizeFinancials(self, financialTables: dict) -> dict:
+        """ ****************************************************
+        * NormalizeFinancials()
+        *
+        * Description:
+        *   Normalizes every table of a reconstructed filing.
+        *
+        * financialTables -> dict : table header => extracted table
+        * returns (dict) : table header => normalized table
+        **************************************************** """
+
+        return {hdr: self.NormalizeTable(table) for hdr, table in financialTables.items()}
@@ -0,0 +1,149 @@
+import re
+
+class StatementHeaderMatcher:
+    """ ****************************************************
+    * StatementHeaderMatcher
+    *
+    * Description:
+    *   Matches financial statement table titles against a set of
+    *   variants (synonyms) for each statement type. All variants are
+    *   compiled into a single case-insensitive regular expression, so
+    *   each text node of a filing is scanned once regardless of how
+    *   many variants are configured.
+    **************************************************** """
+
+    def __init__(self, variants: dict) -> None:
+        """ ****************************************************
+        * __init__()
+        *
+        * Description:
+        *   Builds the variant lookup table and the combined matcher.
+        *   Variants are ordered longest first so that the most specific
+        *   title wins (i.e. "... COMPREHENSIVE INCOME (LOSS)" over
+        *   "... COMPREHENSIVE INCOME").
+        *
+        * variants -> dict[str, list[str]] : canonical header => list of variants
+        **************************************************** """
+
+        # Normalized variant => (canonical header, variant)
+        self._variantLookup = {}
+
+        for canonical, synonyms in variants.items():
+            for variant in [canonical] + list(synonyms):
+                self._variantLookup.setdefault(self._Normalize(variant), (canonical, variant))
+
+        alternatives = sorted(self._variantLookup.keys(), key=len, reverse=True)
+        alternatives = [r'\s+'.join(re.escape(word) for word in alt.split()) for alt in alternatives]
+
+        self._pattern = re.compile(r'(?<![A-Za-z])(?:' + '|'.join(alternatives) + r')(?![A-Za-z])', re.IGNORECASE)
+
+    # Text a mixed-case title node may hold besides the title (parenthetical
+    # qualifiers such as "(Unaudited)", footnote markers and punctuation)
+    _TITLE_REMAINDER = re.compile(r'\([^)]*\)|[^A-Za-z]')
+
+    def _Normalize(self, text: str) -> str:
+        """ ****************************************************
+        * _Normalize()
+        *
+        * Description:
+        *   Upper-cases the text and collapses all whitespace runs.
+        *
+        * text -> str : text to normalize
+        * returns (str) : normalized text
+        **************************************************** """
+
+        return ' '.join(text.upper().split())
+
+    def _Search(self, text: str) -> re.Match:
+        """ ****************************************************
+        * _Search()
+        *
+        * Description:
+        *   Searches a text node for a statement title. Upper-case titles
+        *   are accepted anywhere in the node (as with the original exact
+        *   headers). Other casings must be essentially the whole node
+        *   (see @_TITLE_REMAINDER), so that prose references (i.e. "see the
+        *   Consolidated Balance Sheets") are skipped.
+        *
+        * text -> str : text node to search
+        * returns (re.Match) : match if the node holds a title, None otherwise
+        **************************************************** """
+
+        match = None
+
+        if text:
+            match = self._pattern.search(text)
+
+            if match is not None and not match.group(0).isupper():
+                remainder = text[:match.start()] + ' ' + text[match.end():]
+
+                if self._TITLE_REMAINDER.sub('', remainder) != '':
+                    match = None
+
+        return match
+
+    def _Lookup(self, match: re.Match) -> (str, str):
+        """ ****************************************************
+        * _Lookup()
+        *
+        * Description:
+        *   Looks up the canonical header and variant of a title match.
+        *
+        * match -> re.Match : title match (see @_Search)
+        * returns (str, str) : canonical header and matched variant
+        **************************************************** """
+
+        return self._variantLookup[self._Normalize(match.group(0))]
+
+    def Classify(self, text: str) -> (str, str):
+        """ ****************************************************
+        * Classify()
+        *
+        * Description:
+        *   Classifies a single piece of text.
+        *
+        * text -> str : text to classify
+        * returns (str, str) : canonical header and matched variant,
+        *                      (None, None) if no title is found
+        **************************************************** """
+
+        canonical, variant = None, None
+
+        match = self._Search(text)
+        if match is not None:
+            canonical, variant = self._Lookup(match)
+
+        return canonical, variant
+
+    def FindHeaders(self, soup) -> dict:
+        """ ****************************************************
+        * FindHeaders()
+        *
+        * Description:
+        *   Finds all statement titles in a parsed filing in a single pass
+        *   over its text nodes. Mixed-case titles inside a table (i.e. the
+        *   table of contents) are index entries, not table headings, and
+        *   are skipped.
+        *
+        * soup -> BeautifulSoup : parsed SEC filing
+        * returns (dict) : canonical header => {'variants': [matched variants],
+        *                                       'nodes': [matched text nodes]}
+        **************************************************** """
+
+        headers = {}
+
+        for node in soup.find_all(string=True):
+            match = self._Search(node)
+
+            if match is None or (not match.group(0).isupper() and node.find_parent('table') is not None):
+                continue
+
+            canonical, variant = self._Lookup(match)
+
+            match = headers.setdefault(canonical, {'variants': [], 'nodes': []})
+            match['nodes'].append(node)
+
+            if variant not in match['variants']:
+                match['variants'].append(variant)
+
+        return headers
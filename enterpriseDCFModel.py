@@ -106,18 +106,19 @@ class EnterpriseValue:
         return self.enterpriseValue, self.enterpriseValuePerShare
 
 # TEST CODE ---------------------
-fcf = [3472,4108,4507,4892,5339,5748,6194,6678,7086,7523,168231]
-dr = 0.08
-adjFactor = 1.039
+if __name__ == '__main__':
+    fcf = [3472,4108,4507,4892,5339,5748,6194,6678,7086,7523,168231]
+    dr = 0.08
+    adjFactor = 1.039
 
-ev = EnterpriseValue(fcf, dr, adjFactor)
+    ev = EnterpriseValue(fcf, dr, adjFactor)
 
-assets = [4136,148]
-liabilities = [-10872,-5042,-5841,-14]
+    assets = [4136,148]
+    liabilities = [-10872,-5042,-5841,-14]
 
-ev.addNonOperatingAssets(assets)
-ev.addLiabilities(liabilities)
+    ev.addNonOperatingAssets(assets)
+    ev.addLiabilities(liabilities)
 
-enterpriseVal, perShare = ev.calculateEnterpriseValue(sharesOutstanding=923)
+    enterpriseVal, perShare = ev.calculateEnterpriseValue(sharesOutstanding=923)
 
-print(enterpriseVal)
\ No newline at end of file
+    print(enterpriseVal)
\ No newline at end of file
@@ -0,0 +1,12 @@
+import os
+import sys
+import types
+
+# Modules live at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# settings.py is user provided (see FinancialStatementReader); use placeholder values when absent
+try:
+    import settings
+except ImportError:
+    sys.modules['settings'] = types.SimpleNamespace(EMAIL='test@example.com', WEBSITE='example.com')
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+import BackfillRunner as br
+
+# Fake reader: one accession, shared by the tickers of the same CIK
+class _Reader:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def _GetCIK(self, ticker):
+        return '0001652044'
+
+    def GetFilingList(self, ticker, formTypes):
+        return pd.DataFrame([{
+            'accessionNumber': '0001193125-23-000001',  # filing agent prefix
+            'primaryDocument': 'doc.htm',
+            'form': '10-K',
+            'filingDate': '2023-02-01',
+        }])
+
+    def GetFiling(self, accessionNumber, cik, fileName):
+        self.requests.append(cik)
+        return self.responses.pop(0) if len(self.responses) != 0 else 'filing'
+
+def _Runner(monkeypatch, tmp_path, responses=(), reconstruct=None):
+    monkeypatch.setattr(br.BackfillRunner, '_BACKFILL_DIR', str(tmp_path))
+
+    runner = br.BackfillRunner(retry_delay=0.0, max_attempts=3)
+    runner._reader = _Reader(responses)
+    monkeypatch.setattr(runner._parser, '_ReconstructFinancials', reconstruct or (lambda raw, form: {'BS': None}))
+
+    return runner
+
+def test_TickersSharingACIK(monkeypatch, tmp_path):
+    runner = _Runner(monkeypatch, tmp_path)
+
+    assert runner.Run(['GOOGL', 'GOOG']) == {'GOOGL': (1, 0), 'GOOG': (1, 0)}
+    assert len(runner.ReadBackfill('GOOG')) == 1
+    assert runner._reader.requests == ['0001652044', '0001652044']
+
+    # Restart => both tickers are done
+    restarted = _Runner(monkeypatch, tmp_path)
+    assert restarted.Run(['GOOGL', 'GOOG']) == {'GOOGL': (0, 0), 'GOOG': (0, 0)}
+
+def test_FailedRequestsAreRetried(monkeypatch, tmp_path):
+    runner = _Runner(monkeypatch, tmp_path, responses=[None, None])
+
+    assert runner.Run(['GOOGL']) == {'GOOGL': (1, 0)}
+    assert len(runner._reader.requests) == 3
+    assert runner._journal[('GOOGL', '0001193125-23-000001')]['attempts'] == 3
+
+def test_ParseErrorsAreNotRetried(monkeypatch, tmp_path):
+    def reconstruct(raw, form):
+        raise KeyError('Date')
+
+    runner = _Runner(monkeypatch, tmp_path, reconstruct=reconstruct)
+
+    assert runner.Run(['GOOGL']) == {'GOOGL': (0, 1)}
+    assert len(runner._reader.requests) == 1
+    assert runner._journal[('GOOGL', '0001193125-23-000001')]['status'] == br.BackfillRunner._UNPARSABLE
+
+    # Restart => the unparsable filing is not requested again
+    restarted = _Runner(monkeypatch, tmp_path, reconstruct=reconstruct)
+    assert restarted.Run(['GOOGL']) == {'GOOGL': (0, 0)}
+    assert len(restarted._reader.requests) == 0
+
+def test_UnsupportedFormType(monkeypatch, tmp_path):
+    monkeypatch.setattr(br.BackfillRunner, '_BACKFILL_DIR', str(tmp_path))
+
+    with pytest.raises(ValueError):
+        br.BackfillRunner(form_types=('8-K',))
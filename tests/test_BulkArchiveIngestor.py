@@ -0,0 +1,65 @@
+import json
+import pickle
+import zipfile
+import BulkArchiveIngestor as bai
+import LineItemTaxonomy as lit
+
+def _Fact(start, end, val, filed, form='10-K', fp='FY'):
+    fact = {'end': end, 'val': val, 'filed': filed, 'form': form, 'fp': fp}
+    if start is not None:
+        fact['start'] = start
+    return fact
+
+def _CompanyFacts():
+    return {
+        'cik': 320193,
+        'facts': {
+            'us-gaap': {
+                'Revenues': {
+                    'label': 'Revenues',
+                    'units': {'USD': [
+                        _Fact('2022-01-01', '2022-12-31', 1000, '2023-02-01'),
+                        # 3-month Q4 value reported in the same 10-K, filed later, same end date
+                        _Fact('2022-10-01', '2022-12-31', 300, '2023-02-02'),
+                        _Fact('2022-07-01', '2022-09-30', 250, '2022-11-01', form='10-Q', fp='Q3'),
+                    ]},
+                },
+                'Assets': {
+                    'label': 'Assets',
+                    'units': {'USD': [_Fact(None, '2022-12-31', 5000, '2023-02-01')]},
+                },
+                'EarningsPerShareBasic': {
+                    'label': 'Earnings Per Share, Basic',
+                    'units': {'USD/shares': [_Fact('2022-01-01', '2022-12-31', 1.5, '2023-02-01')],
+                              'shares': [_Fact('2022-01-01', '2022-12-31', 99, '2023-02-01')]},
+                },
+            },
+        },
+    }
+
+def test_BuildFactsTableKeepsAnnualDuration():
+    table = bai._BuildFactsTable(_CompanyFacts(), ('10-K',), lit.LineItemNormalizer())
+
+    assert list(table.columns) == ['2022-12-31']
+    assert table.loc[('Revenue', 'Revenues'), '2022-12-31'] == 1000
+    assert table.loc[('TotalAssets', 'Assets'), '2022-12-31'] == 5000
+    assert table.loc[('EPSBasic', 'EarningsPerShareBasic'), '2022-12-31'] == 1.5
+
+def test_BuildFactsTableQuarterly():
+    table = bai._BuildFactsTable(_CompanyFacts(), ('10-Q',), lit.LineItemNormalizer())
+
+    assert table.loc[('Revenue', 'Revenues'), '2022-09-30'] == 250
+
+def test_IngestCompanyFactsChunk(tmp_path):
+    archivePath = tmp_path / 'companyfacts.zip'
+    with zipfile.ZipFile(archivePath, 'w') as archive:
+        archive.writestr('CIK0000320193.json', json.dumps(_CompanyFacts()))
+
+    output = tmp_path / 'AAPL_companyfacts_financials.pickle'
+    written = bai._IngestCompanyFactsChunk(str(archivePath), {'CIK0000320193.json': [str(output)]}, ('10-K',))
+
+    with open(output, 'rb') as file:
+        financials = pickle.load(file)
+
+    assert written == 1
+    assert financials[0][bai.BulkArchiveIngestor.COMPANY_FACTS].loc[('Revenue', 'Revenues'), '2022-12-31'] == 1000
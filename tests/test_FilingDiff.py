@@ -0,0 +1,57 @@
+import time
+import pandas as pd
+import FilingDiff as fd
+import FinancialStatementParser as fsp
+
+_BALANCE_SHEET = "CONSOLIDATED BALANCE SHEETS"
+
+def _Filing(columns):
+    # Headers as extracted with get_text(strip=True): "December 31," and "2022" joined
+    table = pd.DataFrame(
+        columns,
+        index=pd.Index(['Cash and cash equivalents', 'Total assets'], name='Category'),
+    )
+    return {_BALANCE_SHEET: table}
+
+_FILING_2022 = _Filing({'December 31,2022': [500, 9000], 'December 31,2021': [400, 8000]})
+_FILING_2021 = _Filing({'December 31,2021': [400, 8000], 'December 31,2020': [300, 7000]})
+_RESTATED_2022 = _Filing({'December 31,2022': [500, 9000], 'December 31,2021': [450, 8000]})
+
+def test_ParsePeriod():
+    parser = fsp.FinancialStatementParser()
+
+    assert parser.ParsePeriod('December 31,2022') == pd.Timestamp('2022-12-31')
+    assert parser.ParsePeriod('Year Ended December 31, 2022') == pd.Timestamp('2022-12-31')
+    assert parser.ParsePeriod('Sept. 30, 2023') == pd.Timestamp('2023-09-30')
+    assert parser.ParsePeriod('2022-12-31') == pd.Timestamp('2022-12-31')
+    assert parser.ParsePeriod('December 31,') is None
+    assert parser.ParsePeriod('0001-12-31') is None
+
+def test_UnchangedFilingsAreNotRestatements():
+    assert fd.FilingDiff().DiffFilings(_FILING_2022, _FILING_2021).empty
+
+def test_RestatedOverlappingPeriod():
+    diff = fd.FilingDiff().DiffFilings(_RESTATED_2022, _FILING_2021)
+
+    assert list(diff['Period']) == ['2021-12-31']
+    assert list(diff['Category']) == ['Cash and cash equivalents']
+    assert diff['Change'].iloc[0] == 50
+
+def test_ScanTickerReusesCache(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    diff = fd.FilingDiff()
+    parser = diff._parser
+
+    parser._WriteFinancialsToDatabase('AAPL', [_RESTATED_2022, _FILING_2021])
+    assert list(diff.ScanTicker('AAPL')['Filing']) == [0]
+
+    # New filing => only its table is prepared, the known pair is reused
+    prepared = []
+    prepare = diff._PrepareTable
+    monkeypatch.setattr(diff, '_PrepareTable', lambda table: prepared.append(table) or prepare(table))
+
+    time.sleep(0.01)
+    parser._WriteFinancialsToDatabase('AAPL', [_Filing({'December 31,2023': [600, 9500], 'December 31,2022': [500, 9000]}), _RESTATED_2022, _FILING_2021])
+
+    assert list(diff.ScanTicker('AAPL')['Filing']) == [1]
+    assert len(prepared) == 1
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+import FinancialMetricsEngine as fme
+
+def _Table(labels, columns):
+    return pd.DataFrame(columns, index=pd.Index(labels, name='Category'))
+
+def _Financials():
+    balanceSheet = _Table(
+        ['Current assets', 'Total current assets', 'Total current liabilities'],
+        {'December 31,2022': [20, 100, 50], 'December 31,2021': [18, 90, 60]},
+    )
+    cashFlows = _Table(
+        ['Net cash provided by operating activities', 'Capital expenditures', 'Net sales'],
+        {'Year Ended December 31, 2022': [40, -10, 200], 'Year Ended December 31, 2021': [30, -10, 180]},
+    )
+    return [{'BS': balanceSheet, 'CF': cashFlows}]
+
+def test_BuildTickerPanel():
+    engine = fme.FinancialMetricsEngine()
+    panel = engine._BuildTickerPanel('AAPL', _Financials())
+
+    periods = list(panel.index.get_level_values('Period'))
+    assert periods == [pd.Timestamp('2021-12-31'), pd.Timestamp('2022-12-31')]
+
+    # "Total current assets" over "Current assets"
+    assert list(panel['CurrentAssets']) == [90, 100]
+    assert list(panel['CFO']) == [30, 40]
+
+def test_DiscountRateMustExceedTerminalGrowth(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    engine = fme.FinancialMetricsEngine()
+
+    engine._parser._WriteFinancialsToDatabase('AAPL', _Financials())
+    engine.Update(['AAPL'])
+
+    assert len(engine.ProjectFreeCashFlows('AAPL', 0.08, years=2)) == 3
+
+    with pytest.raises(ValueError):
+        engine.ProjectFreeCashFlows('AAPL', 0.01)
+
+def test_UnsupportedFormType():
+    with pytest.raises(ValueError):
+        fme.FinancialMetricsEngine('10-Q')
@@ -0,0 +1,31 @@
+import os
+import json
+import pandas as pd
+import FinancialStatementService as fss
+
+def _Write(service, value, mtime):
+    table = pd.DataFrame({'December 31, 2022': [value]}, index=pd.Index(['Total assets'], name='Category'))
+    service._parser._WriteFinancialsToDatabase('AAPL', [{'BS': table}])
+
+    filename = service._parser._DatabaseFilename('AAPL', '10-K')
+    os.utime(filename, (mtime, mtime))
+
+def test_RewrittenDatabaseIsServed(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    service = fss.FinancialStatementService()
+
+    _Write(service, 100, 1000000)
+    status, body = service.Handle('/statements', {'ticker': 'AAPL'})
+    assert status == 200 and json.loads(body)['BS']['data'] == [[100]]
+
+    _Write(service, 200, 2000000)
+    status, body = service.Handle('/statements', {'ticker': 'AAPL'})
+    assert status == 200 and json.loads(body)['BS']['data'] == [[200]]
+
+def test_InvalidParameters(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    service = fss.FinancialStatementService()
+
+    assert service.Handle('/statements', {})[0] == 400
+    assert service.Handle('/valuation', {'ticker': 'AAPL'})[0] == 400
+    assert service.Handle('/statements', {'ticker': 'AAPL', 'filing': 'x'})[0] == 400
@@ -0,0 +1,44 @@
+import pandas as pd
+import LineItemTaxonomy as lit
+
+def test_ExactTier():
+    normalizer = lit.LineItemNormalizer()
+
+    assert normalizer.Normalize('Net cash used in operating activities') == 'CFO'
+    assert normalizer.MatchTier('Net cash used in operating activities') == lit.LineItemNormalizer.EXACT
+    assert normalizer.Normalize('Long-term debt, net of current portion') == 'LongTermDebt'
+
+def test_NormalizedTier():
+    normalizer = lit.LineItemNormalizer()
+
+    assert normalizer.Normalize('NET SALES') == 'Revenue'
+    assert normalizer.Normalize('Total stockholders equity') == 'TotalEquity'
+    assert normalizer.MatchTier('Net income (loss) (1)') == lit.LineItemNormalizer.NORMALIZED
+
+def test_FuzzyTier():
+    normalizer = lit.LineItemNormalizer()
+
+    assert normalizer.Normalize('Purchases of property and equipments') == 'CapEx'
+    assert normalizer.MatchTier('Purchases of property and equipments') == lit.LineItemNormalizer.FUZZY
+
+def test_FuzzyTierOpposingTokens():
+    normalizer = lit.LineItemNormalizer()
+
+    for label in [
+        'Other current assets',
+        'Other current liabilities',
+        'Total noncurrent liabilities',
+        'Total non-current assets',
+        'Total other liabilities',
+        'Long-term debt, current portion',
+        'Property and equipment, gross',
+    ]:
+        assert normalizer.Normalize(label) is None, label
+
+def test_NormalizeTable():
+    table = pd.DataFrame({'2022': [1, 2]}, index=pd.Index(['Net sales', 'Other current assets'], name='Category'))
+    table = lit.LineItemNormalizer().NormalizeTable(table)
+
+    assert list(table.index.names) == ['Taxonomy', 'Category']
+    assert table.index[0] == ('Revenue', 'Net sales')
+    assert pd.isna(table.index[1][0])
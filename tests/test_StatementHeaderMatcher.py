@@ -0,0 +1,60 @@
+import FinancialStatementParser as fsp
+import StatementHeaderMatcher as shm
+
+_BALANCE_SHEET = "CONSOLIDATED BALANCE SHEETS"
+
+_TABLE = """
+<table>
+<tr><td></td><td>December 31, 2022</td><td>December 31, 2021</td></tr>
+<tr><td>Cash and cash equivalents</td><td>$</td><td>500</td><td>$</td><td>400</td></tr>
+<tr><td>Total assets</td><td>9,000</td><td>8,000</td></tr>
+</table>
+"""
+
+def _Matcher():
+    return shm.StatementHeaderMatcher({_BALANCE_SHEET: ["CONSOLIDATED BALANCE SHEET"]})
+
+def test_ClassifyCasing():
+    matcher = _Matcher()
+
+    assert matcher.Classify("CONSOLIDATED BALANCE SHEETS") == (_BALANCE_SHEET, _BALANCE_SHEET)
+    assert matcher.Classify("ACME CORP CONSOLIDATED BALANCE SHEET") == (_BALANCE_SHEET, "CONSOLIDATED BALANCE SHEET")
+    assert matcher.Classify("Consolidated Balance Sheets (Unaudited)") == (_BALANCE_SHEET, _BALANCE_SHEET)
+
+    # Prose references are not titles
+    assert matcher.Classify("see the Consolidated Balance Sheets") == (None, None)
+    assert matcher.Classify("Consolidated Balance Sheets include the accounts of") == (None, None)
+
+def test_ReconstructIndexEntryAndHeading():
+    # Index entry and heading lead to the same table, which must only be extracted once
+    filing = f"""
+    <html><body>
+    <p>Consolidated Balance Sheets</p>
+    <p>CONSOLIDATED BALANCE SHEETS</p>
+    <p>(In millions)</p>
+    {_TABLE}
+    </body></html>
+    """
+
+    table = fsp.FinancialStatementParser()._ReconstructFinancials(filing)[_BALANCE_SHEET]
+
+    assert list(table.columns) == ["December 31, 2022", "December 31, 2021"]
+    assert list(table.index) == ["Cash and cash equivalents", "Total assets"]
+    assert table.loc["Total assets", "December 31, 2022"] == 9000
+
+def test_ReconstructSkipsTableOfContents():
+    filing = f"""
+    <html><body>
+    <table><tr><td>Consolidated Balance Sheets</td><td>45</td></tr></table>
+    <p>Unrelated</p>
+    <table><tr><td>Exhibit</td><td>Description</td></tr></table>
+    <p>CONSOLIDATED BALANCE SHEETS</p>
+    {_TABLE}
+    </body></html>
+    """
+
+    parser = fsp.FinancialStatementParser()
+    table = parser._ReconstructFinancials(filing)[_BALANCE_SHEET]
+
+    assert list(table.index) == ["Cash and cash equivalents", "Total assets"]
+    assert parser._lastHeaderMatches[_BALANCE_SHEET] == [_BALANCE_SHEET]